@@ -4,19 +4,63 @@ RSS/Atom Feed 通用获取方法
 
 使用方式：
   python3 rss.py --url "https://example.com/feed.xml" [--limit 20]
+  python3 rss.py --fetch-all <workspace>/methods [--workers 32] [--timeout 30]
+  python3 rss.py --fetch-all <workspace>/methods --cache <workspace>/data/rss-cache.json
+  python3 rss.py --url "https://example.com/feed.xml" --since 2026-01-27 [--until 2026-01-31]
+  python3 rss.py --fetch-all <workspace>/methods --since last-fetched
+  python3 rss.py --fetch-all <workspace>/methods --db <workspace>/data/news.db --since last-fetched
 
-输出：JSON 格式的文章元数据列表
+  --cache 记录每个 feed 的 ETag / Last-Modified / 内容哈希，下次带上条件请求；
+  服务器返回 304 或内容与上次相同时不再解析，输出 {"not_modified": true}（fetch-all 中 count 为 0）。
+  某个 feed 的缓存项在它的结果输出后才更新；带 --db 时要等入库成功，入库失败的保留旧缓存项，下次重新抓取
 
-依赖：pip install feedparser
+  --since / --until 在解析时按 published_at 日期过滤（两端都包含，无日期的条目保留）；
+  feed 按时间倒序时，连续遇到 EARLY_STOP_RUN 条早于 since 的条目即停止，其余条目不再处理。
+  被过滤的条数在结果的 skipped 中，入库时传给 db.py add-items-incremental --skipped。
+  fetch-all 中 --since last-fetched 表示每个信源按自己 method 文件里的 fetch_strategy 取起始日期：
+  incremental（默认）用 last_fetched_date，today 为今天，last-3-days 为 3 天前，all 不限
+
+  --db 时抓取结果在进程内直接入库（daily_news.NewsDB.add_items_incremental：去重、同步日志、
+  source_status），不再经过 JSON 和 db.py 子进程；last-fetched 优先取库中 source_status 的日期
+
+  格式良好的 RSS 2.0 / Atom 1.0 用 xml.etree.iterparse 流式解析（stream_items），逐条产出、
+  随即释放已解析的元素；其他格式（RSS 1.0/RDF、Atom 0.3）或不合法的 XML 退回 feedparser
+
+输出：
+  --url        JSON 格式的文章元数据列表（带 --since/--until 时为 {"items", "skipped"}）
+  --fetch-all  并发抓取目录下所有启用的 extends: rss 信源，每完成一个输出一行 NDJSON
+               （{"source_id", "url", "items", "count", "elapsed_ms"} 或 {"source_id", "url", "error"}，
+               带日期范围时另有 "since", "until", "skipped"），
+               汇总写到 stderr
+  --db         每个信源一行入库结果（{"source_id", "url", "count", "added", "duplicates",
+               "near_duplicates", "skipped", "elapsed_ms"}，不含条目本身），汇总写到 stderr
+
+依赖：pip install feedparser（--fetch-all 另需 pyyaml；--db 使用同一技能的 scripts/daily_news）
 """
 
 import argparse
+import gzip
+import hashlib
+import io
 import json
+import os
+import re
+import socket
 import sys
-from datetime import datetime
+import time
+import urllib.error
+import urllib.request
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from itertools import islice
+from pathlib import Path
+from urllib.parse import urljoin
 
 try:
     import feedparser
+    from feedparser.datetimes import _parse_date as feedparser_date
 except ImportError:
     print(json.dumps({"error": "Missing dependency. Install with: pip install feedparser"}))
     sys.exit(1)
@@ -34,49 +78,576 @@ def parse_date(entry) -> str | None:
     return None
 
 
-def fetch(url: str, limit: int | None = None) -> list | dict:
+USER_AGENT = "daily-news-rss/1.0 (+feedparser)"
+
+# --db 入库时导入 scripts/daily_news（本文件在 references/methods/ 下）
+SCRIPTS_DIR = Path(__file__).resolve().parents[2] / "scripts"
+
+# fetch-all --since 的特殊值：每个信源用自己的 last_fetched_date
+LAST_FETCHED = "last-fetched"
+
+# 按时间倒序的 feed 中连续多少条早于 since 后停止迭代（容忍个别置顶/乱序条目）
+EARLY_STOP_RUN = 3
+
+
+def entry_item(entry) -> dict | None:
+    """feedparser entry → {"title", "url", "published_at"}，缺标题或链接时返回 None"""
+    item = {
+        "title": getattr(entry, "title", "").strip(),
+        "url": getattr(entry, "link", ""),
+    }
+
+    # 提取日期
+    date = parse_date(entry)
+    if date:
+        item["published_at"] = date
+
+    # 只保留有效条目
+    if item.get("url") and item.get("title"):
+        return item
+    return None
+
+
+# ==================== 流式解析（RSS 2.0 / Atom 1.0） ====================
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+XML_BASE = "{http://www.w3.org/XML/1998/namespace}base"
+
+# 与 feedparser 的字段对应：published 优先，其次 updated（见 parse_date）
+PUBLISHED_TAGS = ("pubDate", ATOM_NS + "published", "{http://purl.org/dc/terms/}issued")
+UPDATED_TAGS = ("{http://purl.org/dc/elements/1.1/}date", ATOM_NS + "updated",
+                "{http://purl.org/dc/terms/}modified")
+
+# 提前结束时用来数剩余条目（不再解析 XML）
+ENTRY_TAG_RE = re.compile(rb"<(?:item|(?:[\w.-]+:)?entry)[\s/>]")
+
+
+class UnsupportedFeed(Exception):
+    """不是 stream_items 支持的格式，交给 feedparser"""
+
+
+def _text(elem) -> str:
+    """元素的全部文本（含子元素）"""
+    return "".join(elem.itertext()).strip() if elem is not None else ""
+
+
+def stream_date(value: str) -> str | None:
+    """日期字符串 → UTC 的 ISO 格式，与 feedparser + parse_date 的结果一致"""
+    if not value:
+        return None
+    try:
+        if value[:4].isdigit():
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        else:
+            parsed = parsedate_to_datetime(value)
+        if parsed.tzinfo:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed.replace(microsecond=0).isoformat()
+    except (TypeError, ValueError, IndexError):
+        # 非标准格式交给 feedparser 的宽松解析
+        parsed = feedparser_date(value)
+        return datetime(*parsed[:6]).isoformat() if parsed else None
+
+
+def _entry_date(fields: dict) -> str | None:
+    for tags in (PUBLISHED_TAGS, UPDATED_TAGS):
+        for tag in tags:
+            if tag in fields:
+                date = stream_date(_text(fields[tag]))
+                if date:
+                    return date
+    return None
+
+
+def _resolve(base: str, elem, url: str) -> str:
+    """按 elem 上的 xml:base（相对于 base）补全相对链接，与 feedparser 一致"""
+    if not url:
+        return url
+    return urljoin(urljoin(base, elem.get(XML_BASE, "")), url)
+
+
+def _rss_item(elem, base: str) -> dict | None:
+    """RSS 2.0 <item> → 条目（同 entry_item），base 为 <item> 所在位置的基准 URL"""
+    fields = {}
+    for child in elem:
+        fields.setdefault(child.tag, child)
+
+    link = fields.get("link")
+    url = _resolve(base, link, _text(link)) if link is not None else ""
+    guid = fields.get("guid")
+    if not url and guid is not None and guid.get("isPermaLink", "true") == "true":
+        # 与 feedparser 相同：没有 link 时，永久链接形式的 guid 即链接
+        url = _resolve(base, guid, _text(guid))
+    return _make_item(_text(fields.get("title")), url, _entry_date(fields))
+
+
+def _atom_entry(elem, base: str) -> dict | None:
+    """Atom 1.0 <entry> → 条目（同 entry_item），base 为 <entry> 所在位置的基准 URL"""
+    fields = {}
+    url = ""
+    for child in elem:
+        fields.setdefault(child.tag, child)
+        if child.tag == ATOM_NS + "link" and not url and child.get("rel", "alternate") == "alternate":
+            url = _resolve(base, child, child.get("href", "").strip())
+    title = fields.get(ATOM_NS + "title")
+    if title is not None and title.get("type") == "xhtml":
+        # feedparser 保留 xhtml 标题中的标签，这里不重现，整个 feed 交给它
+        raise UnsupportedFeed("xhtml title")
+    return _make_item(_text(title), url, _entry_date(fields))
+
+
+def _make_item(title: str, url: str, date: str | None) -> dict | None:
+    if not (title and url):
+        return None
+    item = {"title": title, "url": url}
+    if date:
+        item["published_at"] = date
+    return item
+
+
+def stream_items(body: bytes, base_url: str = ""):
+    """
+    流式解析 RSS 2.0 / Atom 1.0，逐条产出 entry_item 格式的条目（无效条目为 None）
+
+    每解析完一个 <item>/<entry> 即清空并从父元素移除，内存占用与条目数无关。
+    相对链接以 base_url（feed 的地址）及沿途各元素的 xml:base 为基准补全。
+
+    Raises:
+        UnsupportedFeed: 根元素不是 <rss> 或 Atom 1.0 的 <feed>，或含 xhtml 标题
+        xml.etree.ElementTree.ParseError: XML 不合法（可能在产出部分条目之后）
+    """
+    events = ET.iterparse(io.BytesIO(body), events=("start", "end"))
+    _, root = next(events)
+    if root.tag == "rss":
+        entry_tag, parse_entry, container_tag = "item", _rss_item, "channel"
+    elif root.tag == ATOM_NS + "feed":
+        entry_tag, parse_entry, container_tag = ATOM_NS + "entry", _atom_entry, None
+    else:
+        raise UnsupportedFeed(root.tag)
+
+    container = root
+    # 各层打开元素的基准 URL（xml:base 逐层相对于上一层）
+    bases = [urljoin(base_url, root.get(XML_BASE, ""))]
+    for event, elem in events:
+        if event == "start":
+            if elem.tag == container_tag:
+                container = elem
+            bases.append(urljoin(bases[-1], elem.get(XML_BASE, "")))
+            continue
+        base = bases.pop()
+        if elem.tag == entry_tag:
+            yield parse_entry(elem, base)
+            elem.clear()
+            if len(container) and container[-1] is elem:
+                del container[-1]
+
+
+def stream_supported(content_type: str) -> bool:
+    """HTTP 头声明了非 UTF-8 编码时，按规范应以它为准，由 feedparser 处理"""
+    charset = re.search(r"charset=[\"']?([\w.:-]+)", content_type or "", re.I)
+    return not charset or charset.group(1).lower() in ("utf-8", "utf8", "us-ascii")
+
+
+# ==================== 筛选 ====================
+
+def select_items(records, since: str | None = None, until: str | None = None,
+                 limit: int | None = None) -> tuple:
+    """
+    按日期范围筛选条目，feed 按时间倒序时提前结束
+
+    Args:
+        records: 可迭代的条目（entry_item / stream_items 的结果，None 表示无效条目）
+        since / until: YYYY-MM-DD，两端都包含；无 published_at 的条目总是保留
+        limit: 最多保留的条目数
+
+    Returns:
+        (保留的条目列表, 跳过的条数, 提前结束时已读取的条目数或 None)
+        提前结束时 records 中剩余的条目未被读取，也未计入跳过数
+    """
+    items = []
+    skipped = 0
+    ordered = True      # 目前为止有日期的条目是否按时间倒序
+    previous = None
+    older_run = 0       # 连续早于 since 的条数
+    read = 0
+
+    for item in records:
+        read += 1
+        if item is None:
+            continue
+        date = item.get("published_at", "")[:10]
+        if date:
+            if previous is not None and date > previous:
+                ordered = False
+            previous = date
+        if date and since and date < since:
+            skipped += 1
+            older_run += 1
+            if ordered and older_run >= EARLY_STOP_RUN:
+                return items, skipped, read
+            continue
+        older_run = 0
+        if date and until and date > until:
+            skipped += 1
+            continue
+        items.append(item)
+        if limit and len(items) >= limit:
+            break
+    return items, skipped, None
+
+
+def collect(records, count_entries, limit: int | None = None,
+            since: str | None = None, until: str | None = None) -> list | dict:
+    """
+    从条目迭代器得到 fetch 的结果
+
+    Args:
+        records: entry_item / stream_items 的结果
+        count_entries: 返回 feed 总条目数的函数，仅在提前结束时调用，用于计算跳过数
+    """
+    if not (since or until):
+        return [item for item in islice(records, limit or None) if item]
+
+    items, skipped, stopped_at = select_items(records, since, until, limit)
+    if stopped_at is not None:
+        # 剩余条目都早于 since，不再解析，只计数
+        skipped += count_entries() - stopped_at
+    return {"items": items, "skipped": skipped}
+
+
+def load_cache(path: str) -> dict:
+    """读取条件请求缓存 {feed URL: {"etag", "last_modified", "sha256", "checked_at"}}"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_cache(path: str, cache: dict):
+    """原子写回缓存（先写临时文件再替换），中途中断不会留下半个文件"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def conditional_get(url: str, cached: dict) -> tuple:
+    """
+    带 If-None-Match / If-Modified-Since 的 GET
+
+    Args:
+        url: Feed URL
+        cached: 该 feed 上次的缓存项（没有则为空 dict）
+
+    Returns:
+        (内容, Content-Type, 最终 URL, 新的缓存项)；304 或内容哈希与上次相同时内容为 None。
+        最终 URL 是跟随重定向后的地址，feed 中的相对链接以它为基准
+    """
+    headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    now = datetime.now().isoformat(timespec="seconds")
+
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+            body = response.read()
+            if response.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            content_type = response.headers.get("Content-Type", "")
+            base_url = response.geturl()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, "", url, dict(cached, checked_at=now)
+        raise
+
+    entry = {"etag": etag, "last_modified": last_modified,
+             "sha256": hashlib.sha256(body).hexdigest(), "checked_at": now}
+    if entry["sha256"] == cached.get("sha256"):
+        # 服务器不支持条件请求，但内容没变
+        return None, content_type, base_url, entry
+    return body, content_type, base_url, entry
+
+
+def fetch(url: str, limit: int | None = None, cached: dict | None = None,
+          since: str | None = None, until: str | None = None):
     """
     获取 RSS/Atom feed 内容
 
+    Returns:
+        文章列表（传入 since/until 时为 {"items": 文章列表, "skipped": 跳过条数}）、
+        {"not_modified": True} 或错误信息，参数见 fetch_with_cache。需要新的缓存项时用 fetch_with_cache
+    """
+    return fetch_with_cache(url, limit, cached, since, until)[0]
+
+
+def fetch_with_cache(url: str, limit: int | None = None, cached: dict | None = None,
+                     since: str | None = None, until: str | None = None) -> tuple:
+    """
+    获取 RSS/Atom feed 内容，同时返回该 feed 新的缓存项
+
     Args:
         url: Feed URL
         limit: 最大条目数（None 表示不限制）
+        cached: 该 feed 上次的缓存项（load_cache 结果中的一项）；传入时发条件请求
+        since / until: 只保留该日期范围内（YYYY-MM-DD，两端包含）的条目，见 select_items
 
     Returns:
-        文章列表或错误信息
+        (结果, 新的缓存项)。结果同 fetch，{"not_modified": True} 表示 feed 自上次以来没有变化；
+        出错时缓存项为 None。
+        缓存项不在这里写入：调用方处理完结果（如入库成功）后再写入缓存，失败时旧缓存项保持不变
     """
-    feed = feedparser.parse(url)
+    try:
+        body, content_type, base_url, entry = conditional_get(url, cached or {})
+    except urllib.error.HTTPError as e:
+        return {"error": f"HTTP {e.code}"}, None
+    except OSError as e:
+        # URLError、超时等网络错误
+        return {"error": f"Failed to fetch feed: {e}"}, None
+    if body is None:
+        return {"not_modified": True}, entry
 
-    # 检查解析错误
-    if feed.bozo and not feed.entries:
-        return {"error": f"Failed to parse feed: {feed.bozo_exception}"}
+    result = None
+    if stream_supported(content_type):
+        try:
+            result = collect(stream_items(body, base_url), lambda: len(ENTRY_TAG_RE.findall(body)),
+                             limit, since, until)
+        except (ET.ParseError, UnsupportedFeed):
+            # 不合法的 XML 或其他格式：整体交给 feedparser 重新解析
+            result = None
 
-    items = []
-    entries = feed.entries[:limit] if limit else feed.entries
+    if result is None:
+        # content-location 让 feedparser 以 feed 地址为基准补全相对链接（否则原样输出 "/a" 这样的路径）
+        feed = feedparser.parse(body, response_headers={"content-type": content_type,
+                                                        "content-location": base_url})
+        # 检查解析错误（解析失败的内容不记缓存，下次照常重试）
+        if feed.bozo and not feed.entries:
+            return {"error": f"Failed to parse feed: {feed.bozo_exception}"}, None
+        result = collect(map(entry_item, feed.entries), lambda: len(feed.entries), limit, since, until)
 
-    for entry in entries:
-        item = {
-            "title": getattr(entry, "title", "").strip(),
-            "url": getattr(entry, "link", ""),
-        }
+    return result, entry
 
-        # 提取日期
-        date = parse_date(entry)
-        if date:
-            item["published_at"] = date
 
-        # 只添加有效条目
-        if item.get("url") and item.get("title"):
-            items.append(item)
+def load_rss_methods(methods_dir: str) -> list:
+    """
+    读取目录下所有启用的 extends: rss method 文件
+
+    Returns:
+        method 配置列表（按文件名排序），feed 地址为 source_url
+    """
+    import yaml
+
+    methods = []
+    for path in sorted(Path(methods_dir).glob("*.y*ml")):
+        with open(path, encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        if config.get("extends") == "rss" and config.get("enabled", True) and config.get("source_url"):
+            config.setdefault("source_id", path.stem)
+            methods.append(config)
+    return methods
+
+
+def method_since(method: dict, since: str | None, today: str | None = None) -> str | None:
+    """
+    信源的起始日期（YYYY-MM-DD）。since 为 last-fetched 时按 method 的 fetch_strategy（默认 incremental），
+    today 默认为当天：
+
+    - incremental：last_fetched_date（首次抓取为 None，即不限）
+    - today：今天
+    - last-3-days：今天往前 3 天
+    - all：None（不限）
+    """
+    if since != LAST_FETCHED:
+        return since
+    day = datetime.fromisoformat(today) if today else datetime.now()
+    strategy = method.get("fetch_strategy") or "incremental"
+    if strategy == "all":
+        return None
+    if strategy == "today":
+        return day.date().isoformat()
+    if strategy == "last-3-days":
+        return (day - timedelta(days=3)).date().isoformat()
+    last = method.get("last_fetched_date")
+    return str(last)[:10] if last else None
+
+
+def fetch_source(method: dict, limit: int | None = None, cache: dict | None = None,
+                 since: str | None = None, until: str | None = None) -> tuple:
+    """抓取单个信源，异常也转为 error 结果，不影响其他信源；返回 (结果, 新的缓存项)，见 fetch_with_cache"""
+    start = time.perf_counter()
+    url = method["source_url"]
+    result = {"source_id": method["source_id"], "url": url}
+    since = method_since(method, since)
+    if since or until:
+        result.update({"since": since, "until": until})
+    try:
+        items, entry = fetch_with_cache(url, limit, cache.get(url, {}) if cache is not None else None,
+                                        since, until)
+    except Exception as e:
+        items, entry = {"error": f"{type(e).__name__}: {e}"}, None
+
+    if isinstance(items, dict):
+        result.update(items)
+        if items.get("not_modified"):
+            result.update({"items": [], "count": 0})
+        elif "items" in items:
+            result["count"] = len(items["items"])
+    else:
+        result.update({"items": items, "count": len(items)})
+    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000)
+    return result, entry
+
+
+def fetch_all(methods: list, limit: int | None = None, workers: int = 32, cache: dict | None = None,
+              since: str | None = None, until: str | None = None):
+    """
+    并发抓取多个信源，按完成顺序逐个产出 (结果, 新的缓存项)
+
+    Args:
+        methods: load_rss_methods 的结果
+        limit: 每个信源的最大条目数
+        workers: 同时进行的抓取数上限
+        cache: 条件请求缓存（只读）；调用方处理完某个结果后用 commit_cache 写入它的缓存项
+        since / until: 日期范围（见 fetch_with_cache）；since 可为 last-fetched，按信源各自的 last_fetched_date
+
+    总耗时约等于最慢的信源（信源数不超过 workers 时），而不是各信源耗时之和。
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(fetch_source, method, limit, cache, since, until) for method in methods]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def commit_cache(cache: dict | None, result: dict, entry: dict | None):
+    """结果已处理完（输出或入库成功）后，把该 feed 的新缓存项写入 cache"""
+    if cache is not None and entry is not None and "error" not in result:
+        cache[result["url"]] = entry
 
-    return items
+
+def open_news_db(db_path: str):
+    """打开 news.db（首次使用时自动建表/迁移），返回 daily_news.db.NewsDB"""
+    if str(SCRIPTS_DIR) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+    from daily_news.db import NewsDB
+
+    return NewsDB(db_path)
+
+
+def ingest_all(news_db, methods: list, limit: int | None = None, workers: int = 32,
+               cache: dict | None = None, since: str | None = None, until: str | None = None):
+    """
+    并发抓取并在本进程内逐个入库，按完成顺序产出每个信源的入库结果
+
+    抓取在线程池中进行，入库只在调用线程中使用 news_db 的连接，
+    某个信源入库时其他信源仍在下载。入库成功（或无需入库）后才更新该信源的缓存项，
+    入库失败时保留旧缓存项，下次运行会重新下载并入库。
+
+    Args:
+        news_db: open_news_db 的结果
+        其余参数同 fetch_all；since 为 last-fetched 时优先使用库中 source_status 的日期
+    """
+    if since == LAST_FETCHED:
+        fetched_dates = {row["source_id"]: row["last_fetched_date"]
+                         for row in news_db.get_source_status() if row["last_fetched_date"]}
+        methods = [dict(method, last_fetched_date=fetched_dates[method["source_id"]])
+                   if method["source_id"] in fetched_dates else method
+                   for method in methods]
+
+    for fetched, entry in fetch_all(methods, limit, workers, cache, since, until):
+        result = {key: fetched[key] for key in ("source_id", "url", "since", "until", "error")
+                  if key in fetched}
+        if "error" not in fetched:
+            skipped = fetched.get("skipped", 0)
+            result.update({"count": fetched["count"], "added": 0, "duplicates": 0,
+                           "near_duplicates": 0, "skipped": skipped})
+            if fetched.get("not_modified"):
+                result["not_modified"] = True
+            elif fetched["items"] or skipped:
+                try:
+                    ingested = news_db.add_items_incremental(
+                        fetched["source_id"], fetched["items"], fetched.get("since"),
+                        fetched.get("until"), skipped)
+                except Exception as e:
+                    result["error"] = f"Failed to ingest: {type(e).__name__}: {e}"
+                else:
+                    for key in ("added", "duplicates", "near_duplicates"):
+                        result[key] = ingested[key]
+        commit_cache(cache, result, entry)
+        result["elapsed_ms"] = fetched["elapsed_ms"]
+        yield result
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Fetch RSS/Atom feed")
-    parser.add_argument("--url", required=True, help="Feed URL")
-    parser.add_argument("--limit", type=int, help="Max items to fetch")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Feed URL")
+    target.add_argument("--fetch-all", metavar="METHODS_DIR",
+                        help="Fetch every enabled extends: rss method in this directory concurrently")
+    parser.add_argument("--limit", type=int, help="Max items to fetch (per feed)")
+    parser.add_argument("--workers", type=int, default=32, help="Max concurrent fetches (--fetch-all)")
+    parser.add_argument("--timeout", type=float, default=30, help="Network timeout in seconds")
+    parser.add_argument("--cache", help="Conditional GET cache file (ETag / Last-Modified / content hash)")
+    parser.add_argument("--since", help=f"Keep entries published on/after this date (YYYY-MM-DD, "
+                                        f"or {LAST_FETCHED} with --fetch-all)")
+    parser.add_argument("--until", help="Keep entries published on/before this date (YYYY-MM-DD)")
+    parser.add_argument("--db", help="Ingest straight into this news.db instead of printing items (--fetch-all)")
     args = parser.parse_args()
+    if args.db and not args.fetch_all:
+        parser.error("--db requires --fetch-all")
+    if args.url and args.since == LAST_FETCHED:
+        parser.error(f"--since {LAST_FETCHED} requires --fetch-all")
+
+    # feedparser 自己发请求，没有超时参数；用全局 socket 超时防止单个信源卡住整批
+    socket.setdefaulttimeout(args.timeout)
+    cache = load_cache(args.cache) if args.cache else None
+
+    if args.url:
+        result, entry = fetch_with_cache(args.url, args.limit,
+                                         cache.get(args.url, {}) if cache is not None else None,
+                                         args.since, args.until)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        if cache is not None and entry is not None:
+            cache[args.url] = entry
+            save_cache(args.cache, cache)
+        sys.exit(0)
+
+    try:
+        methods = load_rss_methods(args.fetch_all)
+    except ImportError:
+        print(json.dumps({"error": "Missing dependency. Install with: pip install pyyaml"}))
+        sys.exit(1)
+
+    start = time.perf_counter()
+    news_db = open_news_db(args.db) if args.db else None
+    if news_db:
+        results = ((result, None) for result in
+                   ingest_all(news_db, methods, args.limit, args.workers, cache, args.since, args.until))
+    else:
+        results = fetch_all(methods, args.limit, args.workers, cache, args.since, args.until)
+
+    ok = failed = not_modified = added = 0
+    for result, entry in results:
+        if "error" in result:
+            failed += 1
+        else:
+            ok += 1
+            not_modified += bool(result.get("not_modified"))
+        added += result.get("added", 0)
+        sys.stdout.write(json.dumps(result, ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+        # ingest_all 已在入库成功后自行更新缓存；只抓取时输出即算处理完
+        commit_cache(cache, result, entry)
+    if news_db:
+        news_db.close()
+    if cache is not None:
+        save_cache(args.cache, cache)
 
-    result = fetch(args.url, args.limit)
-    print(json.dumps(result, ensure_ascii=False, indent=2))
+    summary = {"sources": len(methods), "ok": ok, "failed": failed, "not_modified": not_modified,
+               "wall_ms": round((time.perf_counter() - start) * 1000)}
+    if news_db:
+        summary["added"] = added
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
@@ -8,6 +8,8 @@ import os
 import re
 import json
 import shutil
+import sqlite3
+import argparse
 from pathlib import Path
 from datetime import datetime
 
@@ -107,6 +109,38 @@ def parse_markdown(md_content):
 
     return sections
 
+# daily_digest 的星级 -> 页面分组
+DIGEST_SECTIONS = {5: 'five_star', 4: 'four_star', 3: 'worth_viewing'}
+
+def load_digest(db_path, date):
+    """从 news.db 的 daily_digest 读取某天已排好序的星级分组（该天没有数据时返回 None）"""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        rows = conn.execute(
+            """SELECT tier, title, url, summary, source_id, published_at FROM daily_digest
+               WHERE day = ? AND tier >= 3
+               ORDER BY tier DESC, score DESC, discovered_at DESC""",
+            (date,)
+        ).fetchall()
+    except sqlite3.OperationalError:
+        # 旧版数据库没有 daily_digest
+        rows = []
+    finally:
+        conn.close()
+
+    if not rows:
+        return None
+
+    sections = {name: [] for name in DIGEST_SECTIONS.values()}
+    for tier, title, url, summary, source_id, published_at in rows:
+        sections[DIGEST_SECTIONS[tier]].append({
+            'title': title,
+            'url': url,
+            'summary': summary or '',
+            'meta': f"{source_id} · {(published_at or '')[:10]}"
+        })
+    return sections
+
 def generate_html(data, all_dates):
     """生成 HTML 页面"""
 
@@ -488,8 +522,12 @@ def generate_html(data, all_dates):
 
     return html
 
-def build():
-    """构建网站"""
+def build(db_path=None):
+    """构建网站
+
+    指定 db_path 时，各日期的星级分组直接读 daily_digest（导读仍取自 Markdown），
+    数据库里没有该日期时照常解析 Markdown。
+    """
     workspace = Path.home() / 'Documents/1-Projects/每日资讯日报'
     output_dir = workspace / 'output'
     dist_dir = workspace / 'website/dist'
@@ -513,6 +551,10 @@ def build():
         md_content = md_file.read_text(encoding='utf-8')
         data = parse_markdown(md_content)
         data['date'] = date
+        if db_path:
+            digest = load_digest(db_path, date)
+            if digest:
+                data.update(digest)
 
         html = generate_html(data, all_dates)
 
@@ -529,4 +571,6 @@ def build():
     print(f"\n构建完成！输出目录: {dist_dir}")
 
 if __name__ == '__main__':
-    build()
+    parser = argparse.ArgumentParser(description='Daily News Website Builder')
+    parser.add_argument('--db', help='news.db 路径：星级分组直接读 daily_digest')
+    build(parser.parse_args().db)
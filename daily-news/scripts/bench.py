@@ -0,0 +1,607 @@
+#!/usr/bin/env python3
+"""
+Daily News 数据库基准测试
+
+在临时目录生成合成数据，测量 db.py 各操作的吞吐，输出 JSON。
+
+命令：
+  suite  - 在 1万/10万/100万 条的合成工作区上测量 db.py 各子命令的耗时
+  ingest - 入库吞吐（add-items-incremental），吞吐随规模明显下降或低于下限时以非零状态退出
+  plans  - 报表查询的 EXPLAIN QUERY PLAN，有全表扫描或分页查询要临时排序时以非零状态退出
+  stress - 多进程并发写入（add-items-incremental + update-summary），出错或计数不一致时以非零状态退出
+  rss    - references/methods/rss.py 解析大型 feed：流式解析 vs feedparser
+
+使用示例：
+  python3 bench.py suite --sizes 10000 100000 --output bench.json
+  python3 bench.py suite --workdir /tmp/bench --baseline bench.json
+  python3 bench.py ingest
+  python3 bench.py ingest --sizes 10000 100000
+  python3 bench.py plans --items 1000000
+  python3 bench.py stress --workers 8 --rounds 50
+  python3 bench.py rss --entries 1000 10000
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import multiprocessing
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+
+from daily_news import cli, db
+from daily_news.db import NewsDB
+
+
+def make_items(n: int, prefix: str = "item") -> list:
+    """生成 n 条合成条目"""
+    return [
+        {
+            "title": f"Synthetic article {i}",
+            "url": f"https://example.com/{prefix}/{i}",
+            "published_at": f"2026-01-{i % 28 + 1:02d}T08:00:00",
+        }
+        for i in range(n)
+    ]
+
+
+def fresh_db(workdir: str, name: str) -> str:
+    """在 workdir 下创建并初始化一个新数据库"""
+    db_path = str(Path(workdir) / f"{name}.db")
+    db.init_db(db_path)
+    return db_path
+
+
+# 合成标题的词表：少数高频词 + 大量长尾词，按 Zipf 分布（第 k 个词的权重 1/k）取词
+VOCABULARY = ["ai", "model", "agent", "release", "open", "research", "data", "chip", "cloud", "security"] + [
+    f"term{k}" for k in range(5000)
+]
+_VOCABULARY_WEIGHTS = list(accumulate(1 / (k + 1) for k in range(len(VOCABULARY))))
+
+
+def make_title(rng: random.Random, i: int) -> str:
+    """从词表取 5~10 个词"""
+    words = rng.choices(VOCABULARY, cum_weights=_VOCABULARY_WEIGHTS, k=rng.randint(5, 10))
+    return " ".join(words) + f" #{i}"
+
+
+def build_fixture(db_path: str, n: int, sources: int = 50, days: int = 365, seed: int = 42):
+    """直接写入 n 条历史条目：日期向近期倾斜，信源分布不均，约 70% 已有摘要
+
+    同时写入关键词索引、短词索引和近似重复的 LSH 分段索引（只有近 NEAR_DUP_WINDOW_DAYS 天的条目有），
+    与经由 db.py 入库的数据一致。
+    """
+    rng = random.Random(seed)
+    today = datetime.combine(date.today(), datetime.min.time())
+    window_start = (today - timedelta(days=db.NEAR_DUP_WINDOW_DAYS)).isoformat()
+    conn = db.get_db(db_path)
+
+    for start in range(0, n, 10000):
+        items = []
+        summaries = []
+        keywords = []
+        short_index = []
+        bands = []
+        for i in range(start, min(start + 10000, n)):
+            # 指数分布：越近的日期条目越多。按分位数取值，ID 越大入库越晚（与经由 db.py 入库一致）
+            age = min(-math.log((i + 0.5) / n) * days / 6, days - 1)
+            discovered = today - timedelta(days=age)
+            published = discovered - timedelta(hours=rng.randrange(48))
+            source = f"source-{int(rng.paretovariate(1.2)) % sources}"
+            url = f"https://example.com/{source}/{i}"
+            summarized = rng.random() < 0.7
+            title = make_title(rng, i)
+            items.append((i + 1, source, url, title, published.isoformat(),
+                          discovered.isoformat(), "summarized" if summarized else "pending",
+                          db.url_hash(url)))
+            if discovered.isoformat() >= window_start:
+                bands += [(bucket, i + 1) for bucket in db.minhash_buckets(db.title_features(title))]
+            summary = f"Summary of {title}" if summarized else ""
+            short_index.append((i + 1, db.short_grams(title), db.short_grams(summary)))
+            if summarized:
+                item_keywords = ["ai", f"topic-{i % 100}"]
+                summaries.append((i + 1, summary, rng.randint(1, 5),
+                                  "synthetic", json.dumps(item_keywords),
+                                  discovered.isoformat()))
+                keywords += db._keyword_rows(i + 1, item_keywords)
+        conn.executemany(
+            """INSERT INTO items (id, source_id, url, title, published_at, discovered_at, status, url_hash)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            items
+        )
+        conn.executemany(
+            """INSERT INTO summaries
+               (item_id, summary, relevance_score, relevance_reason, keywords, summarized_at)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            summaries
+        )
+        conn.executemany("INSERT INTO item_keywords (item_id, keyword) VALUES (?, ?)", keywords)
+        conn.executemany("INSERT INTO items_fts_short (rowid, title, summary) VALUES (?, ?, ?)", short_index)
+        conn.executemany("INSERT INTO minhash_bands (bucket, item_id) VALUES (?, ?)", bands)
+        conn.commit()
+
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def capture_queries(db_path: str, method: str, *args) -> list:
+    """在带跟踪的连接上执行 NewsDB 的 method，返回其执行的 SELECT 语句（参数已展开）"""
+    statements = []
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.set_trace_callback(statements.append)
+    try:
+        getattr(NewsDB(db_path, conn=db._SessionConnection(conn)), method)(*args)
+    finally:
+        conn.set_trace_callback(None)
+        conn.close()
+    return [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+
+
+def timed(fn, *args) -> tuple:
+    """执行 fn，返回 (结果, 耗时秒)"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+_parsers = {}
+
+
+def run_command(argv: list) -> int:
+    """与 db.py main() 相同地执行一条命令（含 JSON 序列化），返回输出的行数/条目数"""
+    if argv[0] not in _parsers:
+        _parsers[argv[0]] = cli.build_parser(argv[0])
+    args = _parsers[argv[0]].parse_args(argv)
+    with NewsDB(args.db) as news_db:
+        result = cli.dispatch(news_db, args)
+        if getattr(args, "format", "json") == "ndjson":
+            return sum(1 for row in result if json.dumps(row, ensure_ascii=False))
+    json.dumps(result, ensure_ascii=False, indent=2)
+    return len(result) if isinstance(result, list) else 1
+
+
+def suite_workspace(workdir: str, n: int) -> tuple:
+    """准备 n 条的工作区：已存在则复用（100 万条的数据生成需要几分钟），返回 (库路径, 生成耗时)"""
+    db_path = Path(workdir) / f"workspace-{n}" / "data" / "news.db"
+    if db_path.exists():
+        return str(db_path), 0.0
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = db_path.with_suffix(".building")
+    db.init_db(str(tmp_path))
+    _, elapsed = timed(build_fixture, str(tmp_path), n)
+    for suffix in ("-wal", "-shm"):
+        Path(f"{tmp_path}{suffix}").unlink(missing_ok=True)
+    tmp_path.rename(db_path)
+    return str(db_path), elapsed
+
+
+def suite_cases(db_path: str, workdir: str) -> list:
+    """(用例名, 第 r 次运行的 argv) 列表；写入类用例每次用新的 URL"""
+    today = date.today()
+    yesterday = (today - timedelta(days=1)).isoformat()
+    week_ago = (today - timedelta(days=7)).isoformat()
+    quarter_ago = (today - timedelta(days=90)).isoformat()
+
+    # 复用工作区时，入库用例仍应是一半新 URL、一半重复
+    run_id = datetime.now().strftime("%Y%m%d%H%M%S")
+
+    # check-existing：一半已存在（fixture 的 URL 规律见 build_fixture），一半不存在
+    urls_file = Path(workdir) / "check-urls.txt"
+    urls_file.write_text("\n".join(
+        [f"https://example.com/source-{k % 5}/{k}" for k in range(500)] +
+        [f"https://example.com/missing/{k}" for k in range(500)]
+    ))
+
+    def ingest(r: int) -> list:
+        rng = random.Random(r)
+        items_file = Path(workdir) / f"ingest-{r}.jsonl"
+        with open(items_file, "w") as f:
+            for k in range(100):
+                # 一半新 URL，一半与上一轮重复
+                key = f"{run_id}-{r}-{k}" if k % 2 else f"{run_id}-{r - 1}-{k - 1}"
+                f.write(json.dumps({"url": f"https://bench.example.com/{key}",
+                                    "title": make_title(rng, k),
+                                    "published_at": today.isoformat()}) + "\n")
+        return ["add-items-incremental", "--db", db_path, "--source", "bench",
+                "--items-file", str(items_file)]
+
+    def summaries(r: int) -> list:
+        summaries_file = Path(workdir) / f"summaries-{r}.jsonl"
+        with open(summaries_file, "w") as f:
+            for k in range(100):
+                f.write(json.dumps({"id": r * 100 + k + 1, "summary": f"bench {r}",
+                                    "relevance_score": k % 5 + 1, "keywords": ["bench"]}) + "\n")
+        return ["update-summaries", "--db", db_path, "--summaries-file", str(summaries_file)]
+
+    fixed = lambda *argv: (lambda r: list(argv))
+    return [
+        ("add-items-incremental", ingest),
+        ("check-existing", fixed("check-existing", "--db", db_path, "--urls-file", str(urls_file))),
+        ("check-existing --filter", fixed("check-existing", "--db", db_path, "--urls-file", str(urls_file),
+                                          "--filter")),
+        ("update-summaries", summaries),
+        ("list-pending", fixed("list-pending", "--db", db_path, "--limit", "50")),
+        ("list-today", fixed("list-today", "--db", db_path)),
+        ("digest", fixed("digest", "--db", db_path, "--date", yesterday)),
+        ("list-range 7d", fixed("list-range", "--db", db_path, "--from", week_ago, "--to", today.isoformat())),
+        ("list-range 90d ndjson", fixed("list-range", "--db", db_path, "--from", quarter_ago,
+                                        "--to", today.isoformat(), "--format", "ndjson")),
+        ("list-by-keyword", fixed("list-by-keyword", "--db", db_path, "--keyword", "topic-7",
+                                  "--from", quarter_ago)),
+        ("keyword-stats", fixed("keyword-stats", "--db", db_path, "--from", week_ago)),
+        ("search", fixed("search", "--db", db_path, "--query", "term12 agent", "--from", quarter_ago)),
+        ("search short", fixed("search", "--db", db_path, "--query", "ai", "--from", quarter_ago)),
+        ("stats", fixed("stats", "--db", db_path)),
+        ("list-sources", fixed("list-sources", "--db", db_path)),
+        ("source-status", fixed("source-status", "--db", db_path)),
+        ("sync-log", fixed("sync-log", "--db", db_path, "--limit", "50")),
+        ("last-report", fixed("last-report", "--db", db_path)),
+    ]
+
+
+def bench_suite(workdir: str, sizes: list, repeat: int, baseline: dict = None) -> list:
+    """每个规模的工作区上把各子命令运行 repeat 次，记录耗时的最小/中位/最大值（毫秒）
+
+    baseline 为之前一次 suite 的输出，按 (items, case) 对应，给出中位数的变化比例。
+    """
+    previous = {(r["items"], r["case"]): r for r in (baseline or {}).get("results", [])}
+    results = []
+    for n in sizes:
+        db_path, build_seconds = suite_workspace(workdir, n)
+        if build_seconds:
+            results.append({"items": n, "case": "build-fixture", "seconds": round(build_seconds, 2)})
+
+        for name, argv in suite_cases(db_path, workdir):
+            timings = []
+            rows = 0
+            for r in range(repeat):
+                rows, elapsed = timed(run_command, argv(r + 1))
+                timings.append(elapsed * 1000)
+            entry = {
+                "items": n,
+                "case": name,
+                "runs": repeat,
+                "rows": rows,
+                "min_ms": round(min(timings), 3),
+                "median_ms": round(statistics.median(timings), 3),
+                "max_ms": round(max(timings), 3),
+            }
+            if (n, name) in previous:
+                entry["baseline_median_ms"] = previous[(n, name)]["median_ms"]
+                entry["change"] = round(entry["median_ms"] / entry["baseline_median_ms"] - 1, 3)
+            results.append(entry)
+            print(f"{n:>8} {name:<26} {entry['median_ms']:>10.2f} ms", file=sys.stderr)
+    return results
+
+
+# 入库吞吐随规模下降超过这个倍数视为不可扩展。近似重复检测的候选数与历史多少无关，
+# 剩下的只是索引变大后缓存命中率下降（默认 1万→10万 约 2 倍）；逐条比较历史时会是 10 倍
+INGEST_SCALING_TOLERANCE = 3
+# 入库吞吐的绝对下限（条/秒，任一规模、含近似重复检测）：逐条查询、逐条写分段索引时低于此值
+INGEST_MIN_ITEMS_PER_SEC = 1000
+
+
+def bench_ingest(workdir: str, sizes: list) -> list:
+    """入库吞吐：全新条目，以及同一批数据重复入库（全部命中去重）
+
+    最大规模的 ingest-new 吞吐比最小规模低 INGEST_SCALING_TOLERANCE 倍以上，
+    或任一规模低于 INGEST_MIN_ITEMS_PER_SEC 时，main 以非零状态退出。
+    """
+    results = []
+    for n in sizes:
+        db_path = fresh_db(workdir, f"ingest-{n}")
+        items = make_items(n)
+
+        news_db = NewsDB(db_path)
+        added, elapsed = timed(news_db.add_items_incremental, "bench", items)
+        results.append({
+            "case": "ingest-new",
+            "items": n,
+            "added": added["added"],
+            "seconds": round(elapsed, 4),
+            "items_per_sec": round(n / elapsed),
+        })
+
+        dup, elapsed = timed(news_db.add_items_incremental, "bench", items)
+        news_db.close()
+        results.append({
+            "case": "ingest-duplicate",
+            "items": n,
+            "duplicates": dup["duplicates"],
+            "seconds": round(elapsed, 4),
+            "items_per_sec": round(n / elapsed),
+        })
+    return results
+
+
+# 计数器表的行数只与信源数、状态数有关，stats 整表读取它们是设计如此，不算全表扫描
+BOUNDED_TABLES = ("stat_counters", "source_counters")
+# keyset 分页的 ORDER BY 必须由索引按序输出：用临时 B 树排序时每页都要先排完整个范围，翻页总开销是平方级
+KEYSET_CASES = ("list-range-page",)
+
+
+def bench_plans(workdir: str, n: int) -> list:
+    """报表查询的执行计划：日期过滤应为索引范围查找，而不是全表扫描
+
+    全表扫描的判定与 --profile 相同（db.is_full_scan，BOUNDED_TABLES 除外）；
+    有任何一条，或 KEYSET_CASES 用了临时 B 树排序时，main 以非零状态退出。
+    """
+    db_path = fresh_db(workdir, f"plans-{n}")
+    build_fixture(db_path, n)
+
+    week_ago = (date.today() - timedelta(days=7)).isoformat()
+    today = date.today().isoformat()
+    conn = sqlite3.connect(db_path)
+    # 翻到范围中间的一页：游标取范围内第 n/100 条
+    after_id = conn.execute(
+        "SELECT id FROM items WHERE discovered_at >= ? ORDER BY discovered_at, id LIMIT 1 OFFSET ?",
+        (week_ago, n // 100)
+    ).fetchone()[0]
+    cases = [
+        ("list-today", "list_today"),
+        ("list-range", "list_range", week_ago, today),
+        ("list-range-page", "list_range_page", week_ago, today, after_id, 100),
+        ("list-pending-by-date", "list_pending_by_date", week_ago, today),
+        ("stats", "stats"),
+    ]
+
+    news_db = NewsDB(db_path)
+    results = []
+    for name, method, *args in cases:
+        _, elapsed = timed(getattr(news_db, method), *args)
+        for sql in capture_queries(db_path, method, *args):
+            plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+            results.append({
+                "case": name,
+                "items": n,
+                "seconds": round(elapsed, 4),
+                "sql": " ".join(sql.split()),
+                "plan": plan,
+                "full_scan": db.is_full_scan(
+                    [step for step in plan if step.split()[1] not in BOUNDED_TABLES]),
+                "temp_sort": any(step.startswith("USE TEMP B-TREE") for step in plan),
+            })
+    news_db.close()
+    conn.close()
+    return results
+
+
+def _stress_worker(args: tuple) -> dict:
+    """单个压测进程：交替入库（含与其他进程重叠的 URL）和写摘要"""
+    db_path, worker, rounds = args
+    rng = random.Random(worker)
+    errors = []
+    with NewsDB(db_path) as news_db:
+        for r in range(rounds):
+            items = make_items(20, prefix=f"w{worker}-r{r}") + make_items(10, prefix=f"shared-r{r}")
+            try:
+                news_db.add_items_incremental(f"worker-{worker}", items)
+                for item_id in rng.sample(range(1, 30 * (r + 1)), 10):
+                    news_db.update_summary(item_id, {"summary": f"by {worker}",
+                                                     "relevance_score": rng.randint(1, 5)})
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+    return {"worker": worker, "errors": errors}
+
+
+def bench_stress(workdir: str, workers: int, rounds: int) -> list:
+    """多进程同时写同一个库：不应出现 database is locked，计数器应与实际行数一致（否则 main 以非零状态退出）"""
+    db_path = fresh_db(workdir, "stress")
+
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        outcomes = pool.map(_stress_worker, [(db_path, w, rounds) for w in range(workers)])
+    elapsed = time.perf_counter() - start
+
+    with NewsDB(db_path) as news_db:
+        actual = news_db.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        counted = news_db.stats()["total_items"]
+
+    errors = [e for o in outcomes for e in o["errors"]]
+    return [{
+        "case": "stress",
+        "workers": workers,
+        "rounds": rounds,
+        "seconds": round(elapsed, 4),
+        "items": actual,
+        "counters_consistent": counted == actual,
+        "errors": len(errors),
+        "error_samples": errors[:5],
+    }]
+
+
+RSS_METHOD = Path(__file__).resolve().parent.parent / "references" / "methods" / "rss.py"
+
+
+def load_rss():
+    """按路径导入 references/methods/rss.py（它不在 scripts/ 包内）"""
+    spec = importlib.util.spec_from_file_location("rss", RSS_METHOD)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_feed(n: int, kind: str) -> bytes:
+    """生成 n 条、按时间倒序的 RSS 2.0 或 Atom feed（每条带约 1KB 正文，接近真实归档 feed）"""
+    start = datetime(2026, 6, 30, 12)
+    body = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 18
+    parts = []
+    for i in range(n):
+        published = start - timedelta(hours=i)
+        if kind == "atom":
+            parts.append(
+                f"<entry><title>Synthetic article {i} &amp; more</title>"
+                f'<link rel="alternate" href="https://example.com/atom/{i}"/>'
+                f"<id>urn:bench:{i}</id><published>{published.isoformat()}Z</published>"
+                f"<updated>{published.isoformat()}Z</updated><content type=\"html\">{body}</content></entry>"
+            )
+        else:
+            parts.append(
+                f"<item><title>Synthetic article {i} &amp; more</title>"
+                f"<link>https://example.com/rss/{i}</link><guid>https://example.com/rss/{i}</guid>"
+                f"<pubDate>{published.strftime('%a, %d %b %Y %H:%M:%S')} +0000</pubDate>"
+                f"<description>{body}</description></item>"
+            )
+    if kind == "atom":
+        return ('<?xml version="1.0" encoding="utf-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+                "<title>bench</title>" + "".join(parts) + "</feed>").encode()
+    return ('<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>bench</title>'
+            + "".join(parts) + "</channel></rss>").encode()
+
+
+def bench_rss(sizes: list, repeat: int) -> list:
+    """rss.py 的两条解析路径：耗时、峰值内存，以及两者产出的条目是否一致"""
+    rss = load_rss()
+    parsers = {
+        "stream": lambda body: [item for item in rss.stream_items(body) if item],
+        "feedparser": lambda body: [item for item in map(rss.entry_item, rss.feedparser.parse(body).entries)
+                                    if item],
+    }
+
+    results = []
+    for n in sizes:
+        for kind in ("rss", "atom"):
+            body = make_feed(n, kind)
+            since = (datetime(2026, 6, 30) - timedelta(days=1)).date().isoformat()
+            outputs, medians = {}, {}
+            for name, parse in parsers.items():
+                times = []
+                for _ in range(repeat):
+                    outputs[name], elapsed = timed(parse, body)
+                    times.append(elapsed)
+
+                tracemalloc.start()
+                parse(body)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                medians[name] = statistics.median(times) * 1000
+                results.append({
+                    "case": f"{kind}-{name}",
+                    "entries": n,
+                    "feed_mb": round(len(body) / 1e6, 2),
+                    "median_ms": round(medians[name], 2),
+                    "peak_mb": round(peak / 1e6, 2),
+                })
+
+            # 增量抓取（--since 昨天）：流式解析在提前结束后不再解析剩余 XML
+            since_result, elapsed = timed(rss.collect, rss.stream_items(body),
+                                          lambda: len(rss.ENTRY_TAG_RE.findall(body)), None, since)
+            results.append({
+                "case": f"{kind}-stream-since",
+                "entries": n,
+                "median_ms": round(elapsed * 1000, 2),
+                "kept": len(since_result["items"]),
+                "skipped": since_result["skipped"],
+            })
+            results.append({
+                "case": f"{kind}-identical",
+                "entries": n,
+                "identical": outputs["stream"] == outputs["feedparser"],
+            })
+            print(f"{n:>8} {kind:<5} stream {medians['stream']:>9.1f} ms  "
+                  f"feedparser {medians['feedparser']:>9.1f} ms", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Daily News Database Benchmarks")
+    subparsers = parser.add_subparsers(dest="command", help="Benchmark to run")
+
+    ingest_parser = subparsers.add_parser("ingest", help="Ingest throughput")
+    ingest_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000],
+                               help="Items per call")
+
+    plans_parser = subparsers.add_parser("plans", help="Query plans of report queries")
+    plans_parser.add_argument("--items", type=int, default=1000000, help="Fixture size")
+
+    stress_parser = subparsers.add_parser("stress", help="Concurrent writers")
+    stress_parser.add_argument("--workers", type=int, default=8, help="Writer processes")
+    stress_parser.add_argument("--rounds", type=int, default=50, help="Rounds per worker")
+
+    rss_parser = subparsers.add_parser("rss", help="Streaming parser vs feedparser on large feeds")
+    rss_parser.add_argument("--entries", type=int, nargs="+", default=[1000, 10000], help="Entries per feed")
+    rss_parser.add_argument("--repeat", type=int, default=3, help="Runs per parser")
+
+    suite_parser = subparsers.add_parser("suite", help="Time db.py subcommands on synthetic workspaces")
+    suite_parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000],
+                              help="Workspace sizes (items)")
+    suite_parser.add_argument("--repeat", type=int, default=5, help="Runs per command")
+    suite_parser.add_argument("--workdir", help="Keep and reuse workspaces here (default: temporary)")
+    suite_parser.add_argument("--baseline", help="Previous suite report to compare against")
+    suite_parser.add_argument("--output", help="Write the report to this file instead of stdout")
+
+    args = parser.parse_args()
+
+    if args.command == "suite":
+        baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = args.workdir or tmp
+            Path(workdir).mkdir(parents=True, exist_ok=True)
+            results = bench_suite(workdir, args.sizes, args.repeat, baseline)
+        report = json.dumps({
+            "benchmark": "suite",
+            "environment": {
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+                "date": datetime.now().isoformat(timespec="seconds"),
+            },
+            "results": results,
+        }, ensure_ascii=False, indent=2)
+        if args.output:
+            Path(args.output).write_text(report + "\n")
+        else:
+            print(report)
+        return
+
+    if args.command == "rss":
+        results = bench_rss(args.entries, args.repeat)
+        print(json.dumps({"benchmark": "rss", "results": results}, ensure_ascii=False, indent=2))
+        return
+
+    # 检查项不通过时的说明；有任何一条则以非零状态退出，可直接用作 CI 检查
+    failures = []
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.command == "ingest":
+            results = bench_ingest(workdir, args.sizes)
+            new = sorted((r for r in results if r["case"] == "ingest-new"), key=lambda r: r["items"])
+            if new[0]["items_per_sec"] > new[-1]["items_per_sec"] * INGEST_SCALING_TOLERANCE:
+                failures.append(f"ingest-new: {new[-1]['items_per_sec']} items/s at {new[-1]['items']} items, "
+                                f"{new[0]['items_per_sec']} items/s at {new[0]['items']}")
+            failures += [
+                f"ingest-new: {r['items_per_sec']} items/s at {r['items']} items, below {INGEST_MIN_ITEMS_PER_SEC}"
+                for r in new if r["items_per_sec"] < INGEST_MIN_ITEMS_PER_SEC
+            ]
+        elif args.command == "plans":
+            results = bench_plans(workdir, args.items)
+            failures = [f"{r['case']}: full scan in {r['sql']}" for r in results if r["full_scan"]]
+            failures += [f"{r['case']}: temp B-tree sort in {r['sql']}" for r in results
+                         if r["case"] in KEYSET_CASES and r["temp_sort"]]
+        elif args.command == "stress":
+            results = bench_stress(workdir, args.workers, args.rounds)
+            failures = [f"stress: {r['errors']} errors, e.g. {r['error_samples'][:1]}" for r in results if r["errors"]]
+            failures += ["stress: counters differ from COUNT(*)" for r in results if not r["counters_consistent"]]
+        else:
+            parser.print_help()
+            return
+
+    print(json.dumps({"benchmark": args.command, "results": results}, ensure_ascii=False, indent=2))
+    if failures:
+        for failure in failures:
+            print(f"FAIL {failure}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
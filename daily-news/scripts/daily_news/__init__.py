@@ -0,0 +1,14 @@
+"""
+Daily News 数据库包
+
+  daily_news.db  - NewsDB 与底层函数（连接、迁移、入库、归档）
+  daily_news.cli - db.py 命令行
+"""
+
+
+def __getattr__(name):
+    # 按需导入，import daily_news 本身不加载 sqlite3 等模块
+    if name == "NewsDB":
+        from .db import NewsDB
+        return NewsDB
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,495 @@
+"""
+db.py 的命令行入口：解析参数，在 NewsDB 上执行命令并把结果输出为 JSON
+"""
+
+import argparse
+import json
+import queue
+import sys
+import threading
+
+from . import db
+from .db import NewsDB
+
+
+# 子命令名（按需构建解析器时用来识别 argv 中的子命令）
+COMMANDS = (
+    "init", "add-items", "list-pending", "claim-pending", "release-leases", "update-summary",
+    "update-summaries", "list-today", "digest", "list-range", "list-by-keyword", "keyword-stats",
+    "search", "last-report", "list-sources", "stats", "record-report", "add-items-incremental",
+    "check-existing", "recount", "archive", "source-status", "sync-log", "batch",
+)
+
+# batch 等待下一行输入超过该秒数即提交已执行的命令，释放写锁
+BATCH_IDLE_WAIT = 0.05
+
+# batch 中不能执行的命令：它们要在事务之外建表、ATTACH 或 VACUUM，而 batch 始终在事务中执行命令
+BATCH_UNSUPPORTED = {
+    "batch": "Nested batch is not supported",
+    "init": "init is not supported in batch (run it before the batch; batch migrates the schema itself)",
+    "archive": "archive is not supported in batch (it attaches archive databases and vacuums outside a transaction)",
+}
+
+# batch 的标准输入承载命令流，这些文件参数为 -（标准输入）时会抢读或阻塞在命令流上
+BATCH_STDIN_ARGS = ("items_file", "urls_file", "summaries_file")
+
+
+def duration(text: str) -> str:
+    """argparse 类型：校验时长格式（见 db.parse_duration），原样返回字符串"""
+    try:
+        db.parse_duration(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return text
+
+
+def build_parser(command: str = None) -> argparse.ArgumentParser:
+    """构建命令行解析器（CLI 与 batch 模式共用）
+
+    指定 command 时只构建该子命令的解析器，省去其余子命令的构建开销；
+    未指定或不是已知命令时构建完整的解析器（用于 --help 和报错提示）。
+    """
+    def wanted(name: str) -> bool:
+        return command not in COMMANDS or command == name
+
+    parser = argparse.ArgumentParser(description="Daily News Database Operations")
+    parser.add_argument("--profile", action="store_true",
+                        help="Report per-statement time, rows and full scans after the command")
+    parser.add_argument("--profile-output", choices=["stderr", "table"], default="stderr",
+                        help="Print the profile to stderr or append it to the perf_log table")
+    parser.add_argument("--explain", action="store_true",
+                        help="Include EXPLAIN QUERY PLAN of each statement in the profile")
+    subparsers = parser.add_subparsers(dest="command", help="Command to run")
+
+    # init
+    if wanted("init"):
+        init_parser = subparsers.add_parser("init", help="Initialize database")
+        init_parser.add_argument("--db", required=True, help="Database path")
+
+    # add-items
+    if wanted("add-items"):
+        add_parser = subparsers.add_parser("add-items", help="Add items")
+        add_parser.add_argument("--db", required=True, help="Database path")
+        add_parser.add_argument("--source", required=True, help="Source ID")
+        add_items_group = add_parser.add_mutually_exclusive_group(required=True)
+        add_items_group.add_argument("--items", help="Items JSON")
+        add_items_group.add_argument("--items-file", help="Items NDJSON file (- for stdin)")
+
+    # list-pending
+    if wanted("list-pending"):
+        pending_parser = subparsers.add_parser("list-pending", help="List pending items")
+        pending_parser.add_argument("--db", required=True, help="Database path")
+        pending_parser.add_argument("--limit", type=int, default=10, help="Max items")
+
+    # claim-pending (领取待处理条目)
+    if wanted("claim-pending"):
+        claim_parser = subparsers.add_parser("claim-pending", help="Lease pending items to a worker")
+        claim_parser.add_argument("--db", required=True, help="Database path")
+        claim_parser.add_argument("--worker", required=True, help="Worker ID")
+        claim_parser.add_argument("--lease", default="10m", type=duration, help="Lease duration (30s/10m/2h)")
+        claim_parser.add_argument("--limit", type=int, default=10, help="Max items")
+
+    # release-leases (放弃租约)
+    if wanted("release-leases"):
+        release_parser = subparsers.add_parser("release-leases", help="Return a worker's leased items to pending")
+        release_parser.add_argument("--db", required=True, help="Database path")
+        release_parser.add_argument("--worker", required=True, help="Worker ID")
+        release_parser.add_argument("--ids", help="Item IDs JSON array (default: all)")
+
+    # update-summary
+    if wanted("update-summary"):
+        summary_parser = subparsers.add_parser("update-summary", help="Update summary")
+        summary_parser.add_argument("--db", required=True, help="Database path")
+        summary_parser.add_argument("--id", required=True, type=int, help="Item ID")
+        summary_parser.add_argument("--data", required=True, help="Summary JSON")
+
+    # update-summaries (批量更新摘要)
+    if wanted("update-summaries"):
+        summaries_parser = subparsers.add_parser("update-summaries", help="Update summaries from NDJSON")
+        summaries_parser.add_argument("--db", required=True, help="Database path")
+        summaries_parser.add_argument("--summaries-file", default="-",
+                                      help="NDJSON file, one {id, summary, ...} per line (- for stdin)")
+        summaries_parser.add_argument("--batch-size", type=int, default=200, help="Records per transaction")
+
+    # list-today
+    if wanted("list-today"):
+        today_parser = subparsers.add_parser("list-today", help="List today's items")
+        today_parser.add_argument("--db", required=True, help="Database path")
+
+    # digest (日报摘编)
+    if wanted("digest"):
+        digest_parser = subparsers.add_parser("digest", help="Summarized items of a day grouped by star tier")
+        digest_parser.add_argument("--db", required=True, help="Database path")
+        digest_parser.add_argument("--date", help="Day (YYYY-MM-DD), default today")
+
+    # list-range
+    if wanted("list-range"):
+        range_parser = subparsers.add_parser("list-range", help="List items in date range")
+        range_parser.add_argument("--db", required=True, help="Database path")
+        range_parser.add_argument("--from", dest="from_date", required=True, help="Start date (YYYY-MM-DD)")
+        range_parser.add_argument("--to", dest="to_date", required=True, help="End date (YYYY-MM-DD)")
+        range_parser.add_argument("--after-id", type=int, help="Cursor: last item ID of the previous page")
+        range_parser.add_argument("--page-size", type=int, help="Items per page (ordered by ID)")
+        range_parser.add_argument("--format", choices=["json", "ndjson"], default="json",
+                                  help="ndjson streams one item per line")
+        range_parser.add_argument("--include-archive", action="store_true",
+                                  help="Also query yearly archive databases (see archive)")
+
+    # list-by-keyword
+    if wanted("list-by-keyword"):
+        keyword_parser = subparsers.add_parser("list-by-keyword", help="List items with a keyword")
+        keyword_parser.add_argument("--db", required=True, help="Database path")
+        keyword_parser.add_argument("--keyword", required=True, help="Keyword (case-insensitive)")
+        keyword_parser.add_argument("--from", dest="from_date", help="Start date (YYYY-MM-DD)")
+        keyword_parser.add_argument("--to", dest="to_date", help="End date (YYYY-MM-DD), default today")
+        keyword_parser.add_argument("--limit", type=int, default=50, help="Max items")
+
+    # keyword-stats
+    if wanted("keyword-stats"):
+        keyword_stats_parser = subparsers.add_parser("keyword-stats", help="Keyword frequency")
+        keyword_stats_parser.add_argument("--db", required=True, help="Database path")
+        keyword_stats_parser.add_argument("--from", dest="from_date", help="Start date (YYYY-MM-DD)")
+        keyword_stats_parser.add_argument("--to", dest="to_date", help="End date (YYYY-MM-DD), default today")
+        keyword_stats_parser.add_argument("--keyword", help="Only count this keyword")
+        keyword_stats_parser.add_argument("--limit", type=int, default=20, help="Max keywords")
+
+    # search
+    if wanted("search"):
+        search_parser = subparsers.add_parser("search", help="Full-text search titles and summaries")
+        search_parser.add_argument("--db", required=True, help="Database path")
+        search_parser.add_argument("--query", required=True, help="Search terms (space separated, AND)")
+        search_parser.add_argument("--from", dest="from_date", help="Start date (YYYY-MM-DD)")
+        search_parser.add_argument("--to", dest="to_date", help="End date (YYYY-MM-DD), default today")
+        search_parser.add_argument("--source", help="Source ID filter")
+        search_parser.add_argument("--limit", type=int, default=20, help="Max results")
+
+    # last-report
+    if wanted("last-report"):
+        last_report_parser = subparsers.add_parser("last-report", help="Get last report info")
+        last_report_parser.add_argument("--db", required=True, help="Database path")
+
+    # list-sources
+    if wanted("list-sources"):
+        sources_parser = subparsers.add_parser("list-sources", help="List sources")
+        sources_parser.add_argument("--db", required=True, help="Database path")
+
+    # stats
+    if wanted("stats"):
+        stats_parser = subparsers.add_parser("stats", help="Show statistics")
+        stats_parser.add_argument("--db", required=True, help="Database path")
+
+    # record-report
+    if wanted("record-report"):
+        report_parser = subparsers.add_parser("record-report", help="Record report")
+        report_parser.add_argument("--db", required=True, help="Database path")
+        report_parser.add_argument("--date", required=True, help="Report date (YYYY-MM-DD)")
+        report_parser.add_argument("--items", type=int, help="Item count (default: summarized items of the day)")
+        report_parser.add_argument("--high", type=int, help="High relevance count (default: 4-5 star items of the day)")
+        report_parser.add_argument("--file", required=True, help="Output file path")
+
+    # add-items-incremental (增量抓取)
+    if wanted("add-items-incremental"):
+        incremental_parser = subparsers.add_parser("add-items-incremental", help="Add items with incremental check")
+        incremental_parser.add_argument("--db", required=True, help="Database path")
+        incremental_parser.add_argument("--source", required=True, help="Source ID")
+        incremental_items_group = incremental_parser.add_mutually_exclusive_group(required=True)
+        incremental_items_group.add_argument("--items", help="Items JSON")
+        incremental_items_group.add_argument("--items-file", help="Items NDJSON file (- for stdin)")
+        incremental_parser.add_argument("--since", help="Date range start (YYYY-MM-DD)")
+        incremental_parser.add_argument("--until", help="Date range end (YYYY-MM-DD)")
+        incremental_parser.add_argument("--skipped", type=int, default=0,
+                                        help="Entries the fetcher already skipped by date (rss.py skipped)")
+
+    # check-existing (批量检查URL)
+    if wanted("check-existing"):
+        check_parser = subparsers.add_parser("check-existing", help="Check if URLs exist")
+        check_parser.add_argument("--db", required=True, help="Database path")
+        check_urls_group = check_parser.add_mutually_exclusive_group(required=True)
+        check_urls_group.add_argument("--urls", help="URLs JSON array")
+        check_urls_group.add_argument("--urls-file", help="URLs file, one per line (- for stdin)")
+        check_parser.add_argument("--filter", action="store_true",
+                                  help="Probe the sorted URL hash file next to the database instead of querying items")
+
+    # recount (重建计数器)
+    if wanted("recount"):
+        recount_parser = subparsers.add_parser("recount", help="Rebuild counters after manual edits")
+        recount_parser.add_argument("--db", required=True, help="Database path")
+
+    # archive (归档旧条目并压缩)
+    if wanted("archive"):
+        archive_parser = subparsers.add_parser("archive", help="Move old items to yearly archive DBs and compact")
+        archive_parser.add_argument("--db", required=True, help="Database path")
+        archive_parser.add_argument("--older-than", default="90d", type=duration, help="Age threshold, e.g. 90d")
+        archive_parser.add_argument("--dry-run", action="store_true", help="Only list the archives that would be written")
+
+    # source-status (获取信源状态)
+    if wanted("source-status"):
+        status_parser = subparsers.add_parser("source-status", help="Get source sync status")
+        status_parser.add_argument("--db", required=True, help="Database path")
+        status_parser.add_argument("--source", help="Source ID (optional)")
+
+    # sync-log (获取同步日志)
+    if wanted("sync-log"):
+        log_parser = subparsers.add_parser("sync-log", help="Get sync log")
+        log_parser.add_argument("--db", required=True, help="Database path")
+        log_parser.add_argument("--source", help="Source ID filter")
+        log_parser.add_argument("--limit", type=int, default=10, help="Max entries (0 for no limit)")
+        log_parser.add_argument("--after-id", type=int, help="Cursor: last entry ID of the previous page")
+        log_parser.add_argument("--format", choices=["json", "ndjson"], default="json",
+                                help="ndjson streams one entry per line")
+
+    # batch (长驻批处理模式)
+    if wanted("batch"):
+        batch_parser = subparsers.add_parser("batch", help="Run NDJSON commands from stdin over one connection")
+        batch_parser.add_argument("--db", required=True, help="Database path")
+        batch_parser.add_argument("--batch-size", type=int, default=100, help="Commands per transaction")
+
+    return parser
+
+
+def dispatch(news_db, args: argparse.Namespace):
+    """在 news_db（NewsDB）上执行一条已解析的命令，返回结果（未知命令返回 None）
+
+    init 不经过 news_db：它自己连接并迁移，以便报告本次应用了哪些迁移。
+    """
+    if args.command == "init":
+        result = db.init_db(args.db)
+    elif args.command == "add-items":
+        items = json.loads(args.items) if args.items else db.iter_ndjson(args.items_file)
+        result = news_db.add_items(args.source, items)
+    elif args.command == "list-pending":
+        result = news_db.list_pending(args.limit)
+    elif args.command == "claim-pending":
+        result = news_db.claim_pending(args.worker, args.lease, args.limit)
+    elif args.command == "release-leases":
+        ids = json.loads(args.ids) if args.ids else None
+        result = news_db.release_leases(args.worker, ids)
+    elif args.command == "update-summary":
+        data = json.loads(args.data)
+        result = news_db.update_summary(args.id, data)
+    elif args.command == "update-summaries":
+        if args.summaries_file == "-":
+            result = news_db.update_summaries(sys.stdin, args.batch_size)
+        else:
+            with open(args.summaries_file, encoding="utf-8") as f:
+                result = news_db.update_summaries(f, args.batch_size)
+    elif args.command == "list-today":
+        result = news_db.list_today()
+    elif args.command == "digest":
+        result = news_db.digest(args.date)
+    elif args.command == "list-range":
+        if args.format == "ndjson":
+            result = news_db.iter_range(args.from_date, args.to_date, args.after_id, args.page_size,
+                                        args.include_archive)
+        elif args.page_size or args.after_id:
+            result = news_db.list_range_page(args.from_date, args.to_date,
+                                             args.after_id, args.page_size or 500, args.include_archive)
+        else:
+            result = news_db.list_range(args.from_date, args.to_date, args.include_archive)
+    elif args.command == "list-by-keyword":
+        result = news_db.list_by_keyword(args.keyword, args.from_date, args.to_date, args.limit)
+    elif args.command == "keyword-stats":
+        result = news_db.keyword_stats(args.from_date, args.to_date, args.keyword, args.limit)
+    elif args.command == "search":
+        result = news_db.search(args.query, args.from_date, args.to_date, args.source, args.limit)
+    elif args.command == "last-report":
+        result = news_db.last_report()
+    elif args.command == "list-sources":
+        result = news_db.list_sources()
+    elif args.command == "stats":
+        result = news_db.stats()
+    elif args.command == "record-report":
+        result = news_db.record_report(args.date, args.items, args.high, args.file)
+    elif args.command == "add-items-incremental":
+        items = json.loads(args.items) if args.items else db.iter_ndjson(args.items_file)
+        result = news_db.add_items_incremental(args.source, items, args.since, args.until, args.skipped)
+    elif args.command == "check-existing":
+        urls = json.loads(args.urls) if args.urls else db.iter_urls(args.urls_file)
+        existing = news_db.check_existing_urls(urls, use_filter=args.filter)
+        result = {"existing_urls": list(existing), "count": len(existing)}
+    elif args.command == "recount":
+        result = news_db.recount()
+    elif args.command == "archive":
+        result = news_db.archive(args.older_than, args.dry_run)
+    elif args.command == "source-status":
+        result = news_db.get_source_status(args.source)
+    elif args.command == "sync-log":
+        result = news_db.iter_sync_log(args.source, args.after_id, args.limit)
+        if args.format == "json":
+            result = list(result)
+    else:
+        return None
+
+    return result
+
+
+def _command_argv(db_path: str, command: dict) -> list:
+    """把一条 NDJSON 命令转换为与 CLI 相同的参数列表
+
+    键名即 CLI 选项名（去掉 --），列表/对象值按 JSON 传入，开关选项用 true/false，例如：
+      {"command": "add-items", "source": "claude-blog", "items": [...]}
+      {"command": "check-existing", "urls": [...], "filter": true}
+    """
+    argv = [command["command"], "--db", db_path]
+    for key, value in command.items():
+        if key in ("command", "db") or value is None or value is False:
+            continue
+        if value is True:
+            argv.append(f"--{key}")
+            continue
+        if isinstance(value, (list, dict)):
+            value = json.dumps(value, ensure_ascii=False)
+        argv += [f"--{key}", str(value)]
+    return argv
+
+
+def _read_lines(stream, lines: queue.Queue):
+    """batch 的读取线程：把输入逐行放入队列，结束时放入 None（出错时放入异常）"""
+    try:
+        for line in stream:
+            lines.put(line)
+    except Exception as e:
+        lines.put(e)
+        return
+    lines.put(None)
+
+
+def run_batch(db_path: str, stream, out, batch_size: int = 100) -> dict:
+    """批处理模式：逐行读取 NDJSON 命令，共用一个连接执行
+
+    每条命令在独立的 SAVEPOINT 中执行，失败只回滚该条；
+    每 batch_size 条命令提交一次事务，输入结束时提交剩余部分。
+    下一行输入迟迟未到时也先提交并输出已有结果，等待输入期间不持有写锁。
+    每条命令输出一行 JSON 结果。
+    """
+    parsers = {}
+    conn = db.connect(db_path, isolation_level=None)
+    db.ensure_schema(conn, db_path)
+    news_db = NewsDB(db_path, conn=db._SessionConnection(conn))
+
+    processed = 0
+    failed = 0
+    pending = 0
+
+    # 输入由单独的线程读取，主线程据此判断下一行是否已就绪
+    lines = queue.Queue(maxsize=max(1, batch_size) * 10)
+    threading.Thread(target=_read_lines, args=(stream, lines), daemon=True).start()
+
+    try:
+        while True:
+            try:
+                line = lines.get(timeout=BATCH_IDLE_WAIT)
+            except queue.Empty:
+                # 生产者空闲或较慢：提交并输出，再阻塞等待，避免长时间占着写锁
+                if conn.in_transaction:
+                    conn.execute("COMMIT")
+                pending = 0
+                out.flush()
+                line = lines.get()
+            if line is None:
+                break
+            if isinstance(line, Exception):
+                raise line
+
+            line = line.strip()
+            if not line:
+                continue
+
+            if not conn.in_transaction:
+                db.begin_immediate(conn)
+            conn.execute("SAVEPOINT batch_cmd")
+            try:
+                command = json.loads(line)
+                name = command.get("command")
+                if name in BATCH_UNSUPPORTED:
+                    raise ValueError(BATCH_UNSUPPORTED[name])
+                if name not in parsers:
+                    parsers[name] = build_parser(name)
+                args = parsers[name].parse_args(_command_argv(db_path, command))
+                if getattr(args, "include_archive", False):
+                    raise ValueError("include-archive is not supported in batch "
+                                     "(archive databases cannot be attached inside a transaction)")
+                stdin_args = [arg for arg in BATCH_STDIN_ARGS if getattr(args, arg, None) == "-"]
+                if stdin_args:
+                    option = "--" + stdin_args[0].replace("_", "-")
+                    raise ValueError(f"Reading {option} from stdin (-) is not supported in batch "
+                                     "(stdin carries the batch commands); pass a file path or inline data")
+                result = dispatch(news_db, args)
+                if getattr(args, "format", "json") == "ndjson":
+                    result = list(result)
+                if conn.in_transaction:
+                    conn.execute("RELEASE batch_cmd")
+            except (Exception, SystemExit) as e:
+                # SystemExit 来自 argparse 参数错误
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK TO batch_cmd")
+                    conn.execute("RELEASE batch_cmd")
+                message = str(e) if isinstance(e, Exception) else "Invalid arguments"
+                result = {"error": message, "line": line[:200]}
+                failed += 1
+
+            processed += 1
+            pending += 1
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+            if pending >= batch_size:
+                if conn.in_transaction:
+                    conn.execute("COMMIT")
+                pending = 0
+                out.flush()
+
+        if conn.in_transaction:
+            conn.execute("COMMIT")
+    finally:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        conn.close()
+
+    return {"status": "ok", "processed": processed, "failed": failed}
+
+
+def main(argv: list = None):
+    argv = sys.argv[1:] if argv is None else argv
+    # 第一个是命令名的参数就是子命令（全局选项都写在它前面）
+    command = next((arg for arg in argv if arg in COMMANDS), None)
+    parser = build_parser(command)
+    args = parser.parse_args(argv)
+
+    if args.profile and args.command:
+        db._profiler = db.Profiler(explain=args.explain)
+    try:
+        run_command(parser, args)
+    finally:
+        profiler = db._profiler
+        if profiler is not None:
+            summary = profiler.summary(args.command)
+            db._profiler = None
+            if args.profile_output == "table":
+                db.write_perf_log(args.db, summary)
+            else:
+                print(json.dumps({"profile": summary}, ensure_ascii=False, indent=2), file=sys.stderr)
+
+
+def run_command(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    """执行命令并把结果写到 stdout（batch 的汇总写到 stderr）"""
+    if args.command == "batch":
+        summary = run_batch(args.db, sys.stdin, sys.stdout, args.batch_size)
+        print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
+        return
+
+    if args.command is None:
+        parser.print_help()
+        return
+
+    news_db = None if args.command == "init" else NewsDB(args.db)
+    try:
+        result = dispatch(news_db, args)
+        if getattr(args, "format", "json") == "ndjson":
+            for row in result:
+                sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+            return
+
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    finally:
+        if news_db is not None:
+            news_db.close()
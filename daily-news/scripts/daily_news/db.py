@@ -0,0 +1,2502 @@
+"""
+Daily News 数据库库
+
+供脚本在进程内直接调用，不必每次起一个 db.py 子进程再解析 JSON：
+
+  from daily_news.db import NewsDB
+
+  with NewsDB("./data/news.db") as news_db:
+      news_db.add_items_incremental("claude-blog", items)
+      for item in news_db.iter_range("2026-01-01", "2026-03-31"):
+          ...
+
+NewsDB 持有一个连接，首次打开时自动迁移到最新结构；命令行 db.py 只是它外面的一层参数解析。
+"""
+
+import bisect
+import hashlib
+import json
+import mmap
+import os
+import random
+import re
+import sqlite3
+import struct
+import sys
+import time
+from array import array
+from datetime import datetime, date, timedelta
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+try:
+    import fcntl
+except ImportError:  # Windows：不使用 URL 过滤文件
+    fcntl = None
+
+
+# 流式入库时每块的条目数
+CHUNK_SIZE = 500
+
+# 并发写入策略：等待锁的超时（毫秒，可用环境变量覆盖）与超时后的重试次数
+BUSY_TIMEOUT_MS = int(os.environ.get("DAILY_NEWS_BUSY_TIMEOUT_MS", "5000"))
+BUSY_RETRIES = 5
+
+# 每个连接缓存的预编译语句数（sqlite3 默认 128；NewsDB 长期持有连接，调大些）
+CACHED_STATEMENTS = 256
+
+# --profile 时的性能分析器（None 表示不分析）
+_profiler = None
+
+
+class _SessionConnection:
+    """batch 模式下的共享连接
+
+    NewsDB 各方法照常调用 commit()，但提交和关闭由 batch 统一处理，
+    从而整批命令共用一个连接、一个事务。
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def connect(db_path: str, isolation_level: str | None = "IMMEDIATE") -> sqlite3.Connection:
+    """按统一的连接策略打开数据库
+
+    - WAL：读写互不阻塞，多个抓取/摘要进程可同时访问
+    - synchronous=NORMAL：WAL 下仍保证一致性，提交不必每次 fsync
+    - busy_timeout：遇到写锁先等待 BUSY_TIMEOUT_MS
+    - 隐式事务用 BEGIN IMMEDIATE：开始即取写锁，避免先读后写时升级锁失败
+    - cached_statements：连接内缓存预编译语句，同一条 SQL 再次执行时跳过解析
+    """
+    conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=isolation_level,
+                           cached_statements=CACHED_STATEMENTS,
+                           factory=_ProfiledConnection if _profiler else sqlite3.Connection)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if _profiler:
+        _profiler.attach(conn)
+    return conn
+
+
+def get_db(db_path: str) -> sqlite3.Connection:
+    """获取数据库连接（首次连接时自动迁移到最新结构）"""
+    conn = connect(db_path)
+    ensure_schema(conn, db_path)
+    return conn
+
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    message = str(error)
+    return "database is locked" in message or "database is busy" in message
+
+
+# ==================== 性能分析（--profile） ====================
+
+def is_full_scan(plan: list) -> bool:
+    """EXPLAIN QUERY PLAN 的各步（detail 列）中是否有全表扫描
+
+    覆盖索引上的 SCAN 同样是整棵 B 树遍历，也算全表扫描；虚拟表（全文索引）的 SCAN 由其自身索引完成，不算。
+    """
+    return any(step.startswith("SCAN") and "VIRTUAL TABLE" not in step for step in plan)
+
+
+class Profiler:
+    """按 SQL 语句汇总执行情况，命令结束后输出到 stderr 或写入 perf_log 表
+
+    - ms：execute 及之后取结果（迭代 / fetch*）的墙钟时间之和
+    - rows：查询返回的行数，写语句为影响的行数
+    - vm_steps：进度回调统计的 SQLite 虚拟机指令数（每 PROGRESS_STEPS 条回调一次），
+      与扫描的行数成正比；远大于 rows 说明扫描了大量用不到的行
+    - full_scan：EXPLAIN QUERY PLAN 中有 SCAN（如对列套 date() 的过滤，即使是覆盖索引也要遍历全部行）
+    """
+
+    PROGRESS_STEPS = 1000
+
+    def __init__(self, explain: bool = False):
+        self.explain = explain
+        self.statements = {}
+        self.current = None
+        self.started = time.perf_counter()
+
+    def attach(self, conn: sqlite3.Connection):
+        conn.profiler = self
+        conn.set_progress_handler(self._on_progress, self.PROGRESS_STEPS)
+
+    def _on_progress(self) -> int:
+        if self.current is not None:
+            self.current["vm_steps"] += self.PROGRESS_STEPS
+        return 0
+
+    def statement(self, conn: sqlite3.Connection, sql: str, params) -> dict:
+        """取得 sql 的汇总记录；第一次出现时生成执行计划"""
+        key = " ".join(sql.split())
+        stat = self.statements.get(key)
+        if stat is None:
+            stat = self.statements[key] = {
+                "sql": key, "calls": 0, "ms": 0.0, "rows": 0, "vm_steps": 0, "full_scan": False,
+            }
+            if key.split(" ", 1)[0].upper() in ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE"):
+                try:
+                    plan = [row[3] for row in sqlite3.Connection.execute(
+                        conn, "EXPLAIN QUERY PLAN " + sql, params)]
+                except sqlite3.Error:
+                    plan = []
+                stat["full_scan"] = is_full_scan(plan)
+                if self.explain:
+                    stat["plan"] = plan
+        stat["calls"] += 1
+        return stat
+
+    def measure(self, stat: dict, fn, *args):
+        """执行 fn 并把耗时和虚拟机指令数计入 stat"""
+        outer = self.current
+        self.current = stat
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            stat["ms"] += (time.perf_counter() - start) * 1000
+            self.current = outer
+
+    def summary(self, command: str) -> dict:
+        statements = sorted(self.statements.values(), key=lambda s: s["ms"], reverse=True)
+        for stat in statements:
+            stat["ms"] = round(stat["ms"], 3)
+        return {
+            "command": command,
+            "wall_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "sql_ms": round(sum(s["ms"] for s in statements), 3),
+            "full_scans": sum(s["full_scan"] for s in statements),
+            "statements": statements,
+        }
+
+
+class _ProfiledCursor(sqlite3.Cursor):
+    """统计返回行数与取结果耗时的游标"""
+
+    stat = None
+
+    def _fetch(self, fn, *args):
+        if self.stat is None:
+            return fn(*args)
+        result = self.connection.profiler.measure(self.stat, fn, *args)
+        if isinstance(result, list):
+            self.stat["rows"] += len(result)
+        elif result is not None:
+            self.stat["rows"] += 1
+        return result
+
+    def __next__(self):
+        return self._fetch(super().__next__)
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self._fetch(super().fetchmany, *args)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+
+class _ProfiledConnection(sqlite3.Connection):
+    """--profile 时 connect() 使用的连接：按语句记录耗时、行数与执行计划"""
+
+    profiler = None
+
+    def execute(self, sql, parameters=()):
+        cursor = self.cursor(_ProfiledCursor)
+        if self.profiler is None:
+            return cursor.execute(sql, parameters)
+        cursor.stat = self.profiler.statement(self, sql, parameters)
+        self.profiler.measure(cursor.stat, cursor.execute, sql, parameters)
+        # 返回结果集的语句（含 INSERT ... RETURNING）在取结果时计数，这里只计不返回行的写语句
+        if cursor.description is None and cursor.rowcount > 0:
+            cursor.stat["rows"] += cursor.rowcount
+        return cursor
+
+    def executemany(self, sql, seq_of_parameters):
+        if self.profiler is None:
+            return super().executemany(sql, seq_of_parameters)
+        stat = self.profiler.statement(self, sql, ())
+        cursor = self.profiler.measure(stat, super().executemany, sql, seq_of_parameters)
+        stat["rows"] += max(cursor.rowcount, 0)
+        return cursor
+
+
+def write_perf_log(db_path: str, summary: dict):
+    """把一次 --profile 的结果逐语句追加到 perf_log 表"""
+    conn = get_db(db_path)
+    now = datetime.now().isoformat()
+    conn.executemany(
+        """INSERT INTO perf_log (command, sql, calls, ms, rows, vm_steps, full_scan, plan, created_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        [(summary["command"], s["sql"], s["calls"], s["ms"], s["rows"], s["vm_steps"], s["full_scan"],
+          json.dumps(s["plan"], ensure_ascii=False) if "plan" in s else None, now)
+         for s in summary["statements"]]
+    )
+    conn.commit()
+    conn.close()
+
+
+def run_write(conn: sqlite3.Connection, fn, *args):
+    """在一个事务中执行 fn(*args) 并提交；超过 busy_timeout 仍被锁时回滚并退避重试
+
+    fn 必须可以安全重放（只依赖传入的参数）。batch 模式下事务由 batch 管理，不在这里重试。
+    """
+    if isinstance(conn, _SessionConnection):
+        return fn(*args)
+
+    for attempt in range(BUSY_RETRIES):
+        try:
+            result = fn(*args)
+            conn.commit()
+            return result
+        except sqlite3.OperationalError as e:
+            if not _is_busy(e) or attempt == BUSY_RETRIES - 1:
+                raise
+            conn.rollback()
+            _busy_backoff(attempt)
+
+
+def begin_immediate(conn: sqlite3.Connection):
+    """开启写事务（BEGIN IMMEDIATE）；超过 busy_timeout 仍被锁时退避重试，策略与 run_write 相同
+
+    用于自行管理事务的连接（isolation_level=None），如 batch 模式。
+    """
+    for attempt in range(BUSY_RETRIES):
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            return
+        except sqlite3.OperationalError as e:
+            if not _is_busy(e) or attempt == BUSY_RETRIES - 1:
+                raise
+            _busy_backoff(attempt)
+
+
+def _busy_backoff(attempt: int):
+    time.sleep(0.05 * 2 ** attempt + random.uniform(0, 0.05))
+
+
+# 规范化时去掉的跟踪参数（另外所有 utm_* 都会去掉）
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_hsenc", "_hsmi", "ref_src",
+}
+
+
+def canonicalize_url(url: str) -> str:
+    """规范化 URL，用作去重键
+
+    统一 http/https 与大小写、去掉 www.、默认端口、片段、跟踪参数和末尾斜杠，
+    剩余查询参数排序。只用于计算哈希，items.url 仍保存原始 URL。
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme == "http":
+        scheme = "https"
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path.rstrip("/")
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ))
+
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def url_hash(url: str) -> int:
+    """规范化 URL 的有符号 64 位哈希（对应 items.url_hash）"""
+    digest = hashlib.blake2b(canonicalize_url(url).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+# 近似重复检测：标题特征集合的 MinHash 签名按 LSH 分段建索引，
+# 分段命中的候选再按特征集合的 Jaccard 相似度精确确认
+MINHASH_BANDS = 20
+# 每段的 MinHash 个数：Jaccard 0.7 时命中至少一段的概率约 97%，0.3 时约 5%，
+# 共有常见词的无关标题很少落进同一分段
+MINHASH_ROWS = 5
+NEAR_DUP_JACCARD = 0.7
+# 只与最近 N 天入库的条目比较（同一新闻通常几天内被多个信源转载），更早的分段索引随入库清理
+NEAR_DUP_WINDOW_DAYS = 7
+# 每个分段最多取最近的 N 个候选，单条入库的比较次数不超过 MINHASH_BANDS * N，与历史多少无关
+MINHASH_BAND_CANDIDATES = 10
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]+")
+# 常见虚词不作为特征，否则大量无关标题会因共有虚词落进同一分段
+_STOPWORDS = {
+    "a", "an", "the", "of", "to", "in", "on", "for", "with", "and", "or", "is", "are",
+    "at", "by", "from", "as", "its", "it", "this", "that", "how", "why", "what", "new",
+}
+# 每个 MinHash 用一个掩码与特征哈希异或作为置换，比乘法取模的置换快一个数量级
+_MINHASH_MASKS = [
+    int.from_bytes(hashlib.blake2b(f"minhash-{i}".encode(), digest_size=8).digest(), "little")
+    for i in range(MINHASH_BANDS * MINHASH_ROWS)
+]
+# 全部置换值打包在一个大整数里，每个占一列 _LANE_BITS 位（64 位值 + 比较用的保护位），
+# 异或置换和逐列取最小都是整列的整数运算，单个标题的开销与置换个数基本无关
+_LANE_BITS = 72
+_LANES_ONE = sum(1 << (_LANE_BITS * k) for k in range(MINHASH_BANDS * MINHASH_ROWS))
+_LANES_GUARD = _LANES_ONE << 64
+_LANES_MASKS = sum(mask << (_LANE_BITS * k) for k, mask in enumerate(_MINHASH_MASKS))
+_LANE_MAX = (1 << 64) - 1
+_BAND_BITS = _LANE_BITS * MINHASH_ROWS
+# 分段键：该段的 MinHash 拼成的整数对小于 2^56 的素数取模
+_BAND_PRIME = (1 << 56) - 5
+
+
+def title_features(text: str) -> set:
+    """标题特征：英文/数字按词（去掉常见虚词），中文按相邻两字"""
+    features = set()
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token.isascii():
+            if token not in _STOPWORDS:
+                features.add(token)
+        elif len(token) == 1:
+            features.add(token)
+        else:
+            features.update(token[i:i + 2] for i in range(len(token) - 1))
+    return features
+
+
+def _is_cjk(ch: str) -> bool:
+    """与 _TOKEN_RE、_SHORT_GRAM_RE 相同的汉字范围"""
+    return "\u4e00" <= ch <= "\u9fff"
+
+
+_SHORT_GRAM_RE = re.compile(r"[\u4e00-\u9fff]+|(?<![0-9A-Za-z])[0-9A-Za-z]{2}(?![0-9A-Za-z])")
+
+
+def short_grams(text: str) -> str:
+    """items_fts_short 的索引文本：中文相邻两字及每段末字、独立的两字符英文/数字词，空格分隔"""
+    grams = []
+    for token in _SHORT_GRAM_RE.findall(text):
+        if _is_cjk(token[0]):
+            grams += [token[i:i + 2] for i in range(len(token) - 1)]
+            grams.append(token[-1])
+        else:
+            grams.append(token)
+    return " ".join(grams)
+
+
+def _fts_phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _short_term_query(term: str, exact_only: bool = False) -> str:
+    """短词（1～2 个字符）在 items_fts_short 上的 MATCH 表达式，不可索引时返回 None
+
+    exact_only=True 时只返回索引结果与子串匹配完全一致的表达式；
+    否则对含汉字的混合词（如 "A股"）返回其汉字的前缀查询，作为 LIKE 的候选集。
+    """
+    if all(_is_cjk(ch) for ch in term):
+        return _fts_phrase(term) if len(term) == 2 else _fts_phrase(term) + "*"
+    if len(term) == 2 and term.isascii() and term.isalnum():
+        return _fts_phrase(term)
+    if exact_only:
+        return None
+    cjk = [ch for ch in term if _is_cjk(ch)]
+    return _fts_phrase(cjk[0]) + "*" if cjk else None
+
+
+def minhash_buckets(features: set) -> list:
+    """特征集合的 LSH 分段键（对应 minhash_bands.bucket）：段号 << 56 | 该段 MinHash 的组合哈希"""
+    signature = None
+    for f in features:
+        h = int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "little")
+        permuted = h * _LANES_ONE ^ _LANES_MASKS
+        if signature is None:
+            signature = permuted
+            continue
+        # 逐列取最小：各列带保护位相减，保护位保留的列即 signature >= permuted，换成 permuted
+        ge = (((signature | _LANES_GUARD) - permuted) & _LANES_GUARD) >> 64
+        signature ^= (signature ^ permuted) & ge * _LANE_MAX
+
+    band_mask = (1 << _BAND_BITS) - 1
+    return [
+        band << 56 | (signature >> band * _BAND_BITS & band_mask) % _BAND_PRIME
+        for band in range(MINHASH_BANDS)
+    ]
+
+
+def jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def day_range(from_date: str, to_date: str = None) -> tuple:
+    """把闭区间日期 [from_date, to_date] 转成半开区间 [from_date, to_date + 1天)
+
+    ISO 时间字符串按字典序比较即按时间比较，直接对列做范围比较可以走索引，
+    而 date(column) = ? 会让索引失效。
+    """
+    end = date.fromisoformat(to_date or from_date) + timedelta(days=1)
+    return from_date, end.isoformat()
+
+
+def iter_ndjson(path: str):
+    """逐行读取 NDJSON 文件（path 为 "-" 时读取 stdin），空行跳过"""
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def iter_urls(path: str):
+    """逐行读取 URL：每行可以是纯 URL、JSON 字符串或带 url 字段的 JSON 对象"""
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line[0] in "{\"":
+                value = json.loads(line)
+                yield value["url"] if isinstance(value, dict) else value
+            else:
+                yield line
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def chunked(iterable, size: int):
+    """把可迭代对象切成不超过 size 的列表块"""
+    chunk = []
+    for x in iterable:
+        chunk.append(x)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ==================== 数据库结构与迁移 ====================
+
+# v1：基础表
+SCHEMA_V1 = """
+-- 内容元数据表
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_id TEXT NOT NULL,
+    url TEXT UNIQUE NOT NULL,
+    title TEXT NOT NULL,
+    published_at TEXT,
+    discovered_at TEXT NOT NULL,
+    status TEXT DEFAULT 'pending'
+);
+
+-- 摘要表
+CREATE TABLE IF NOT EXISTS summaries (
+    item_id INTEGER PRIMARY KEY,
+    summary TEXT NOT NULL,
+    relevance_score INTEGER,
+    relevance_reason TEXT,
+    keywords TEXT,
+    summarized_at TEXT NOT NULL,
+    FOREIGN KEY (item_id) REFERENCES items(id)
+);
+
+-- 日报记录表
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT UNIQUE NOT NULL,
+    item_count INTEGER,
+    high_relevance_count INTEGER,
+    created_at TEXT NOT NULL,
+    file_path TEXT
+);
+
+-- 索引
+CREATE INDEX IF NOT EXISTS idx_items_status ON items(status);
+CREATE INDEX IF NOT EXISTS idx_items_source ON items(source_id);
+CREATE INDEX IF NOT EXISTS idx_items_discovered ON items(discovered_at);
+"""
+
+# v2：增量抓取（原 migrate_v2.sql）
+SCHEMA_V2 = """
+-- 信源同步日志表
+CREATE TABLE IF NOT EXISTS source_sync_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source_id TEXT NOT NULL,
+    sync_date TEXT NOT NULL,
+    items_fetched INTEGER DEFAULT 0,
+    items_new INTEGER DEFAULT 0,
+    items_duplicate INTEGER DEFAULT 0,
+    items_skipped INTEGER DEFAULT 0,  -- 因日期限制跳过的条目
+    latest_item_date TEXT,
+    date_range_start TEXT,
+    date_range_end TEXT,
+    created_at TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_log_source ON source_sync_log(source_id);
+CREATE INDEX IF NOT EXISTS idx_sync_log_date ON source_sync_log(sync_date);
+
+-- 信源状态表（快速查询用）
+CREATE TABLE IF NOT EXISTS source_status (
+    source_id TEXT PRIMARY KEY,
+    last_fetched_date TEXT,
+    last_fetched_count INTEGER DEFAULT 0,
+    total_items_fetched INTEGER DEFAULT 0,
+    total_items_unique INTEGER DEFAULT 0,
+    first_fetch_date TEXT,
+    updated_at TEXT NOT NULL
+);
+"""
+
+# v4：计数器
+SCHEMA_V4 = """
+-- 计数器表（由触发器维护，stats/list-sources 直接读取）
+CREATE TABLE IF NOT EXISTS source_counters (
+    source_id TEXT PRIMARY KEY,
+    total_items INTEGER NOT NULL DEFAULT 0,
+    pending_count INTEGER NOT NULL DEFAULT 0,
+    last_discovered TEXT
+);
+
+-- status:<状态> 各状态条目数；high_relevance 4-5星摘要数
+CREATE TABLE IF NOT EXISTS stat_counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_items_count_insert AFTER INSERT ON items
+BEGIN
+    INSERT INTO source_counters (source_id, total_items, pending_count, last_discovered)
+    VALUES (NEW.source_id, 1, NEW.status = 'pending', NEW.discovered_at)
+    ON CONFLICT(source_id) DO UPDATE SET
+        total_items = total_items + 1,
+        pending_count = pending_count + (NEW.status = 'pending'),
+        last_discovered = max(coalesce(last_discovered, ''), NEW.discovered_at);
+    INSERT INTO stat_counters (name, value) VALUES ('status:' || coalesce(NEW.status, ''), 1)
+    ON CONFLICT(name) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_items_count_delete AFTER DELETE ON items
+BEGIN
+    UPDATE source_counters SET
+        total_items = total_items - 1,
+        pending_count = pending_count - (OLD.status = 'pending')
+    WHERE source_id = OLD.source_id;
+    UPDATE stat_counters SET value = value - 1
+    WHERE name = 'status:' || coalesce(OLD.status, '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_items_count_update AFTER UPDATE OF status, source_id ON items
+WHEN OLD.status IS NOT NEW.status OR OLD.source_id IS NOT NEW.source_id
+BEGIN
+    UPDATE source_counters SET
+        total_items = total_items - 1,
+        pending_count = pending_count - (OLD.status = 'pending')
+    WHERE source_id = OLD.source_id;
+    UPDATE stat_counters SET value = value - 1
+    WHERE name = 'status:' || coalesce(OLD.status, '');
+    INSERT INTO source_counters (source_id, total_items, pending_count, last_discovered)
+    VALUES (NEW.source_id, 1, NEW.status = 'pending', NEW.discovered_at)
+    ON CONFLICT(source_id) DO UPDATE SET
+        total_items = total_items + 1,
+        pending_count = pending_count + (NEW.status = 'pending'),
+        last_discovered = max(coalesce(last_discovered, ''), NEW.discovered_at);
+    INSERT INTO stat_counters (name, value) VALUES ('status:' || coalesce(NEW.status, ''), 1)
+    ON CONFLICT(name) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summaries_count_insert AFTER INSERT ON summaries
+WHEN NEW.relevance_score >= 4
+BEGIN
+    INSERT INTO stat_counters (name, value) VALUES ('high_relevance', 1)
+    ON CONFLICT(name) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summaries_count_delete AFTER DELETE ON summaries
+WHEN OLD.relevance_score >= 4
+BEGIN
+    UPDATE stat_counters SET value = value - 1 WHERE name = 'high_relevance';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summaries_count_update AFTER UPDATE OF relevance_score ON summaries
+WHEN coalesce(OLD.relevance_score >= 4, 0) != coalesce(NEW.relevance_score >= 4, 0)
+BEGIN
+    INSERT INTO stat_counters (name, value)
+    VALUES ('high_relevance', CASE WHEN NEW.relevance_score >= 4 THEN 1 ELSE -1 END)
+    ON CONFLICT(name) DO UPDATE SET value = value + excluded.value;
+END;
+"""
+
+# v6：关键词索引
+SCHEMA_V6 = """
+-- 关键词索引（由 update_summary 写入，按关键词查询/统计用）
+CREATE TABLE IF NOT EXISTS item_keywords (
+    item_id INTEGER NOT NULL,
+    keyword TEXT NOT NULL,  -- 小写、去首尾空白
+    PRIMARY KEY (item_id, keyword)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_item_keywords_keyword ON item_keywords(keyword, item_id);
+
+CREATE TRIGGER IF NOT EXISTS trg_summaries_keywords_delete AFTER DELETE ON summaries
+BEGIN
+    DELETE FROM item_keywords WHERE item_id = OLD.item_id;
+END;
+"""
+
+# v7：全文索引同步触发器
+SCHEMA_V7_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS trg_items_fts_insert AFTER INSERT ON items
+BEGIN
+    INSERT INTO items_fts (rowid, title, summary) VALUES (NEW.id, NEW.title, '');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_items_fts_delete AFTER DELETE ON items
+BEGIN
+    DELETE FROM items_fts WHERE rowid = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_items_fts_update AFTER UPDATE OF title ON items
+BEGIN
+    UPDATE items_fts SET title = NEW.title WHERE rowid = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summaries_fts_insert AFTER INSERT ON summaries
+BEGIN
+    UPDATE items_fts SET summary = NEW.summary WHERE rowid = NEW.item_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summaries_fts_update AFTER UPDATE OF summary ON summaries
+BEGIN
+    UPDATE items_fts SET summary = NEW.summary WHERE rowid = NEW.item_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summaries_fts_delete AFTER DELETE ON summaries
+BEGIN
+    UPDATE items_fts SET summary = '' WHERE rowid = OLD.item_id;
+END;
+"""
+
+
+def _execute_script(conn: sqlite3.Connection, script: str):
+    """逐条执行 SQL 脚本（不同于 executescript，不会隐式提交当前事务）"""
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+
+
+def _migrate_v1(conn: sqlite3.Connection):
+    _execute_script(conn, SCHEMA_V1)
+
+
+def _migrate_v2(conn: sqlite3.Connection):
+    _execute_script(conn, SCHEMA_V2)
+
+
+def _migrate_v3(conn: sqlite3.Connection):
+    """items.url_hash：规范化 URL 的 64 位哈希，唯一索引
+
+    同一规范化 URL 的多条历史记录只有最早的一条获得 url_hash，
+    其余保持 NULL，以便建立唯一索引。
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(items)")}
+    if "url_hash" not in columns:
+        conn.execute("ALTER TABLE items ADD COLUMN url_hash INTEGER")
+
+    seen = {
+        row[0] for row in conn.execute("SELECT url_hash FROM items WHERE url_hash IS NOT NULL")
+    }
+    backfill = []
+    for row in conn.execute("SELECT id, url FROM items WHERE url_hash IS NULL ORDER BY id").fetchall():
+        key = url_hash(row[1])
+        if key not in seen:
+            seen.add(key)
+            backfill.append((key, row[0]))
+    conn.executemany("UPDATE items SET url_hash = ? WHERE id = ?", backfill)
+
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_items_url_hash ON items(url_hash)")
+
+
+def _migrate_v4(conn: sqlite3.Connection):
+    _execute_script(conn, SCHEMA_V4)
+    _recount(conn)
+
+
+def _migrate_v5(conn: sqlite3.Connection):
+    """items.lease_owner / lease_expires：claim-pending 的租约"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(items)")}
+    for column in ("lease_owner", "lease_expires"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE items ADD COLUMN {column} TEXT")
+
+
+def _migrate_v6(conn: sqlite3.Connection):
+    """item_keywords，并从 summaries.keywords（JSON）回填"""
+    _execute_script(conn, SCHEMA_V6)
+    if conn.execute("SELECT 1 FROM item_keywords LIMIT 1").fetchone():
+        return
+
+    rows = []
+    for row in conn.execute("SELECT item_id, keywords FROM summaries WHERE keywords IS NOT NULL"):
+        try:
+            keywords = json.loads(row[1])
+        except json.JSONDecodeError:
+            continue
+        rows += _keyword_rows(row[0], keywords)
+    conn.executemany("INSERT OR IGNORE INTO item_keywords (item_id, keyword) VALUES (?, ?)", rows)
+
+
+def _migrate_v7(conn: sqlite3.Connection):
+    """标题+摘要的 FTS5 全文索引及同步触发器
+
+    使用 trigram 分词：中文没有空格分词，trigram 对中英文都能做子串匹配。
+    SQLite 未编译 FTS5 时跳过（search 命令会报错，其他命令不受影响）。
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'"
+    ).fetchone()
+    if not exists:
+        try:
+            conn.execute(
+                "CREATE VIRTUAL TABLE items_fts USING fts5(title, summary, tokenize = 'trigram')"
+            )
+        except sqlite3.OperationalError:
+            return
+        conn.execute(
+            """INSERT INTO items_fts (rowid, title, summary)
+               SELECT i.id, i.title, coalesce(s.summary, '')
+               FROM items i LEFT JOIN summaries s ON s.item_id = i.id"""
+        )
+    _execute_script(conn, SCHEMA_V7_TRIGGERS)
+
+
+# v8：归档墓碑
+SCHEMA_V8 = """
+-- 已归档条目的 url_hash：归档后再次抓到同一 URL 仍按重复处理
+CREATE TABLE IF NOT EXISTS archived_urls (
+    url_hash INTEGER PRIMARY KEY
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_items_archived_skip BEFORE INSERT ON items
+WHEN NEW.url_hash IN (SELECT url_hash FROM archived_urls)
+BEGIN
+    SELECT RAISE(IGNORE);
+END;
+"""
+
+
+def _migrate_v8(conn: sqlite3.Connection):
+    _execute_script(conn, SCHEMA_V8)
+
+
+# v9：近似重复检测
+SCHEMA_V9 = """
+-- 标题 MinHash 的 LSH 分段索引（由 add-items-incremental 入库时写入，只保留近 NEAR_DUP_WINDOW_DAYS 天）
+CREATE TABLE IF NOT EXISTS minhash_bands (
+    bucket INTEGER NOT NULL,  -- 段号 << 56 | 该段的组合哈希，见 minhash_buckets
+    item_id INTEGER NOT NULL,
+    PRIMARY KEY (bucket, item_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_minhash_bands_item ON minhash_bands(item_id);
+
+CREATE INDEX IF NOT EXISTS idx_items_duplicate_of ON items(duplicate_of) WHERE duplicate_of IS NOT NULL;
+
+CREATE TRIGGER IF NOT EXISTS trg_items_minhash_delete AFTER DELETE ON items
+BEGIN
+    DELETE FROM minhash_bands WHERE item_id = OLD.id;
+END;
+"""
+
+
+def _migrate_v9(conn: sqlite3.Connection):
+    """items.duplicate_of 及 LSH 分段索引，按块回填窗口内的条目（不回溯标记重复）"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(items)")}
+    if "duplicate_of" not in columns:
+        conn.execute("ALTER TABLE items ADD COLUMN duplicate_of INTEGER")
+    _execute_script(conn, SCHEMA_V9)
+    if conn.execute("SELECT 1 FROM minhash_bands LIMIT 1").fetchone():
+        return
+
+    window_start = (datetime.now() - timedelta(days=NEAR_DUP_WINDOW_DAYS)).isoformat()
+    rows = conn.execute("SELECT id, title FROM items WHERE discovered_at >= ?", (window_start,))
+    for chunk in chunked(rows, CHUNK_SIZE):
+        bands = []
+        for item_id, title in chunk:
+            features = title_features(title)
+            if len(features) >= 3:
+                bands += [(bucket, item_id) for bucket in minhash_buckets(features)]
+        conn.executemany("INSERT OR IGNORE INTO minhash_bands (bucket, item_id) VALUES (?, ?)", bands)
+
+
+# v10：--profile 结果
+SCHEMA_V10 = """
+-- db.py --profile --profile-output table 逐语句追加的性能记录
+CREATE TABLE IF NOT EXISTS perf_log (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    command TEXT NOT NULL,
+    sql TEXT NOT NULL,
+    calls INTEGER,
+    ms REAL,
+    rows INTEGER,
+    vm_steps INTEGER,
+    full_scan INTEGER,
+    plan TEXT,  -- EXPLAIN QUERY PLAN（JSON 数组，仅 --explain 时）
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_perf_log_created ON perf_log(created_at);
+"""
+
+
+def _migrate_v10(conn: sqlite3.Connection):
+    _execute_script(conn, SCHEMA_V10)
+
+
+# v11：日报摘编
+# 星级分组：score >= 5 五星推荐，4 四星推荐，3 值得一看，其余（1-2 分或未打分）为 0 其他
+DIGEST_TIER_SQL = """CASE WHEN {score} >= 5 THEN 5 WHEN {score} >= 4 THEN 4
+                         WHEN {score} >= 3 THEN 3 ELSE 0 END"""
+
+# 把一条摘要（NEW.item_id 或 s.item_id）连同条目信息写入 daily_digest
+DIGEST_INSERT_SQL = """INSERT INTO daily_digest
+    (item_id, day, tier, score, discovered_at, source_id, url, title, published_at, duplicate_of,
+     summary, relevance_score, relevance_reason, keywords)
+    SELECT i.id, substr(i.discovered_at, 1, 10), {tier}, coalesce({s}.relevance_score, 0),
+           i.discovered_at, i.source_id, i.url, i.title, i.published_at, i.duplicate_of,
+           {s}.summary, {s}.relevance_score, {s}.relevance_reason, {s}.keywords"""
+
+SCHEMA_V11 = f"""
+-- 日报摘编：每条已摘要条目一行（摘要与条目信息冗余存放），按发现日期、星级预先排好序
+-- 由 summaries 的触发器维护，list-today / digest / record-report 直接按索引读取
+CREATE TABLE IF NOT EXISTS daily_digest (
+    item_id INTEGER PRIMARY KEY,
+    day TEXT NOT NULL,       -- 发现日期 YYYY-MM-DD
+    tier INTEGER NOT NULL,   -- 5 / 4 / 3 / 0，见 DIGEST_TIER_SQL
+    score INTEGER NOT NULL,  -- coalesce(relevance_score, 0)，组内排序用
+    discovered_at TEXT NOT NULL,
+    source_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    published_at TEXT,
+    duplicate_of INTEGER,
+    summary TEXT,
+    relevance_score INTEGER,
+    relevance_reason TEXT,
+    keywords TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_daily_digest_rank ON daily_digest(day, tier, score, discovered_at);
+
+-- 每天各星级的条目数
+CREATE TABLE IF NOT EXISTS daily_digest_counts (
+    day TEXT NOT NULL,
+    tier INTEGER NOT NULL,
+    items INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, tier)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_digest_count_insert AFTER INSERT ON daily_digest
+BEGIN
+    INSERT INTO daily_digest_counts (day, tier, items) VALUES (NEW.day, NEW.tier, 1)
+    ON CONFLICT(day, tier) DO UPDATE SET items = items + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_daily_digest_count_delete AFTER DELETE ON daily_digest
+BEGIN
+    UPDATE daily_digest_counts SET items = items - 1 WHERE day = OLD.day AND tier = OLD.tier;
+END;
+
+-- 摘要变化时整行重写（先删后插，计数触发器随之增减）
+CREATE TRIGGER IF NOT EXISTS trg_summaries_digest_insert AFTER INSERT ON summaries
+BEGIN
+    DELETE FROM daily_digest WHERE item_id = NEW.item_id;
+    {DIGEST_INSERT_SQL.format(tier=DIGEST_TIER_SQL.format(score="NEW.relevance_score"), s="NEW")}
+    FROM items i WHERE i.id = NEW.item_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summaries_digest_update AFTER UPDATE ON summaries
+BEGIN
+    DELETE FROM daily_digest WHERE item_id = OLD.item_id;
+    {DIGEST_INSERT_SQL.format(tier=DIGEST_TIER_SQL.format(score="NEW.relevance_score"), s="NEW")}
+    FROM items i WHERE i.id = NEW.item_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summaries_digest_delete AFTER DELETE ON summaries
+BEGIN
+    DELETE FROM daily_digest WHERE item_id = OLD.item_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_items_digest_delete AFTER DELETE ON items
+BEGIN
+    DELETE FROM daily_digest WHERE item_id = OLD.id;
+END;
+"""
+
+
+def _migrate_v11(conn: sqlite3.Connection):
+    """daily_digest 及其计数，从已有摘要回填"""
+    _execute_script(conn, SCHEMA_V11)
+    if conn.execute("SELECT 1 FROM daily_digest LIMIT 1").fetchone():
+        return
+    conn.execute(
+        DIGEST_INSERT_SQL.format(tier=DIGEST_TIER_SQL.format(score="s.relevance_score"), s="s")
+        + "\nFROM summaries s JOIN items i ON i.id = s.item_id"
+    )
+
+
+def _migrate_v12(conn: sqlite3.Connection):
+    """删除旧版 migrate_v2.sql 建的 idx_items_url_prefix（与 items.url 上的唯一索引重复）"""
+    conn.execute("DROP INDEX IF EXISTS idx_items_url_prefix")
+
+
+def _migrate_v13(conn: sqlite3.Connection):
+    """去掉 items.url 的 UNIQUE 约束及其自动索引，URL 去重只靠 url_hash 唯一索引
+
+    url_hash 是规范化 URL 的哈希，原样相同的 URL 必然哈希相同，url 上的唯一索引是多余的，
+    却要为每条 URL 全文再存一份。SQLite 不能直接删除约束，按官方的重建流程：
+    建新表、复制、删旧表、改名，再按原样重建 items 上的索引和触发器。
+    """
+    sql = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'items'").fetchone()[0]
+    rebuilt, count = re.subn(r"\burl TEXT UNIQUE NOT NULL", "url TEXT NOT NULL", sql)
+    if not count:
+        return
+    dependents = [row[0] for row in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE tbl_name = 'items' AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+    )]
+    sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'items'").fetchone()
+
+    conn.execute(re.sub(r"^CREATE TABLE \w+", "CREATE TABLE items_rebuild", rebuilt))
+    conn.execute("INSERT INTO items_rebuild SELECT * FROM items")
+    # 其他表的触发器引用 items；改名时不让 SQLite 按新 schema 校验它们（此刻 items 不存在）
+    conn.execute("PRAGMA legacy_alter_table = ON")
+    conn.execute("DROP TABLE items")
+    conn.execute("ALTER TABLE items_rebuild RENAME TO items")
+    conn.execute("PRAGMA legacy_alter_table = OFF")
+    for statement in dependents:
+        conn.execute(statement)
+    if sequence:
+        # 保持自增序列，已删除条目的 ID 不会被重新分配
+        conn.execute("UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = 'items'", sequence)
+
+
+# v14：短词索引。trigram 匹配不了 3 个字符以下的词，这里为每条记录生成
+# 中文相邻两字（及每段末字）和独立的两字符英文/数字词（见 short_grams），交给 unicode61 分词的 FTS5 表。
+# 索引文本由入库和写摘要的代码生成后批量写入（同 item_keywords），触发器只负责删除
+SCHEMA_V14_TRIGGERS = """
+CREATE TRIGGER IF NOT EXISTS trg_items_fts_short_delete AFTER DELETE ON items
+BEGIN
+    DELETE FROM items_fts_short WHERE rowid = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_summaries_fts_short_delete AFTER DELETE ON summaries
+BEGIN
+    UPDATE items_fts_short SET summary = '' WHERE rowid = OLD.item_id;
+END;
+"""
+
+
+def _migrate_v14(conn: sqlite3.Connection):
+    """短词辅助索引 items_fts_short 及同步触发器（SQLite 未编译 FTS5 时跳过，同 v7）"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts_short'"
+    ).fetchone()
+    if not exists:
+        try:
+            # 查询只用单个词元，不需要位置信息（detail = none 让索引小得多）
+            conn.execute(
+                """CREATE VIRTUAL TABLE items_fts_short
+                   USING fts5(title, summary, tokenize = 'unicode61', detail = none)"""
+            )
+        except sqlite3.OperationalError:
+            return
+        rows = conn.execute(
+            "SELECT i.id, i.title, s.summary FROM items i LEFT JOIN summaries s ON s.item_id = i.id"
+        )
+        for chunk in chunked(rows, CHUNK_SIZE):
+            conn.executemany(
+                "INSERT INTO items_fts_short (rowid, title, summary) VALUES (?, ?, ?)",
+                [(item_id, short_grams(title), short_grams(summary or "")) for item_id, title, summary in chunk]
+            )
+    _execute_script(conn, SCHEMA_V14_TRIGGERS)
+
+
+# 编号迁移：(版本, 说明, 函数)。只能追加，不要修改已发布的版本
+MIGRATIONS = [
+    (1, "Base tables: items, summaries, reports", _migrate_v1),
+    (2, "Add incremental fetch support: source_sync_log, source_status tables", _migrate_v2),
+    (3, "Add items.url_hash (canonical URL dedup key)", _migrate_v3),
+    (4, "Add trigger-maintained counters", _migrate_v4),
+    (5, "Add claim-pending lease columns", _migrate_v5),
+    (6, "Add item_keywords index", _migrate_v6),
+    (7, "Add items_fts full-text index", _migrate_v7),
+    (8, "Add archived_urls tombstones", _migrate_v8),
+    (9, "Add MinHash near-duplicate index", _migrate_v9),
+    (10, "Add perf_log table", _migrate_v10),
+    (11, "Add daily_digest materialized report slices", _migrate_v11),
+    (12, "Drop redundant idx_items_url_prefix", _migrate_v12),
+    (13, "Drop UNIQUE on items.url (url_hash is the dedup key)", _migrate_v13),
+    (14, "Add items_fts_short index for short search terms", _migrate_v14),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# 本进程已确认为最新结构的数据库路径
+_schema_ready = set()
+
+
+def _current_version(conn: sqlite3.Connection) -> int:
+    """读取结构版本：优先 PRAGMA user_version，兼容手动执行 migrate_v2.sql 的旧库"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version:
+        return version
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if "schema_version" in tables:
+        return conn.execute("SELECT coalesce(MAX(version), 0) FROM schema_version").fetchone()[0]
+    return 1 if "items" in tables else 0
+
+
+def migrate(conn: sqlite3.Connection) -> list:
+    """在一个事务中应用所有待执行的迁移，返回本次应用的版本号
+
+    已应用的版本缓存在 PRAGMA user_version（数据库文件头），
+    最新的库只需读一次文件头，不会执行任何 DDL。
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return []
+
+    if not conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone():
+        # 新库：auto_vacuum=INCREMENTAL 供 archive 回收空间。它只能在建表前设置，
+        # 而文件头已在切换 WAL 时写入，须 VACUUM 一次才生效（空库瞬间完成）
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # 拿到写锁后重新读取，其他进程可能刚完成迁移
+        current = _current_version(conn)
+        applied = []
+        for version, description, fn in MIGRATIONS:
+            if version <= current:
+                continue
+            fn(conn)
+            applied.append(version)
+
+        if applied:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS schema_version (
+                     version INTEGER PRIMARY KEY,
+                     applied_at TEXT NOT NULL,
+                     description TEXT
+                   )"""
+            )
+            now = datetime.now().isoformat()
+            conn.executemany(
+                "INSERT OR REPLACE INTO schema_version (version, applied_at, description) VALUES (?, ?, ?)",
+                [(v, now, d) for v, d, _ in MIGRATIONS if v in applied]
+            )
+        conn.execute(f"PRAGMA user_version = {max(current, SCHEMA_VERSION)}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return applied
+
+
+def ensure_schema(conn: sqlite3.Connection, db_path: str):
+    """每个进程对每个库只检查一次结构版本"""
+    if db_path not in _schema_ready:
+        migrate(conn)
+        _schema_ready.add(db_path)
+
+
+def init_db(db_path: str) -> dict:
+    """初始化数据库（已有数据库则升级到最新结构）"""
+    # 确保目录存在
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+    conn = connect(db_path)
+    applied = migrate(conn)
+    conn.close()
+    _schema_ready.add(db_path)
+
+    return {
+        "status": "initialized",
+        "path": db_path,
+        "schema_version": SCHEMA_VERSION,
+        "migrations_applied": applied
+    }
+
+
+def _recount(conn: sqlite3.Connection):
+    """从 items/summaries 重建计数器表"""
+    conn.execute("DELETE FROM source_counters")
+    conn.execute(
+        """INSERT INTO source_counters (source_id, total_items, pending_count, last_discovered)
+           SELECT source_id, COUNT(*), SUM(status = 'pending'), MAX(discovered_at)
+           FROM items GROUP BY source_id"""
+    )
+    conn.execute("DELETE FROM stat_counters")
+    conn.execute(
+        """INSERT INTO stat_counters (name, value)
+           SELECT 'status:' || coalesce(status, ''), COUNT(*) FROM items GROUP BY status"""
+    )
+    conn.execute(
+        """INSERT INTO stat_counters (name, value)
+           SELECT 'high_relevance', COUNT(*) FROM summaries WHERE relevance_score >= 4"""
+    )
+
+
+def _insert_chunk(conn: sqlite3.Connection, source_id: str, chunk: list, now: str) -> list:
+    """以单条多行 INSERT 写入一块条目，返回新插入行的 (id, url, title)
+
+    规范化 URL（url_hash）重复的条目由 ON CONFLICT DO NOTHING 跳过，不抛异常；
+    sqlite3 的 executemany 会丢弃 RETURNING 结果，所以这里拼成一条多行 VALUES。
+    """
+    values = ",".join(["(?, ?, ?, ?, ?, ?)"] * len(chunk))
+    params = []
+    for item in chunk:
+        params += [source_id, item["url"], item["title"], item.get("published_at"), now,
+                   url_hash(item["url"])]
+    return conn.execute(
+        f"""INSERT INTO items (source_id, url, title, published_at, discovered_at, url_hash)
+            VALUES {values}
+            ON CONFLICT DO NOTHING
+            RETURNING id, url, title""",
+        params
+    ).fetchall()
+
+
+def _has_short_index(conn: sqlite3.Connection) -> bool:
+    """items_fts_short 是否存在（SQLite 未编译 FTS5 时 v14 不建）"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts_short'"
+    ).fetchone() is not None
+
+
+def _index_short_titles(conn: sqlite3.Connection, inserted: list):
+    """为新插入的 (id, url, title) 写入短词索引"""
+    if inserted and _has_short_index(conn):
+        conn.executemany(
+            "INSERT INTO items_fts_short (rowid, title, summary) VALUES (?, ?, '')",
+            [(item_id, short_grams(title)) for item_id, _, title in inserted]
+        )
+
+
+def _index_minhash(conn: sqlite3.Connection, source_id: str, inserted: list, now: str) -> int:
+    """为新插入的一块条目查找近似重复并写入标题 LSH 分段索引，返回标记为近似重复的条数
+
+    按分段索引找出近 NEAR_DUP_WINDOW_DAYS 天内其他信源的候选，
+    标题 Jaccard ≥ NEAR_DUP_JACCARD 的取最相似的一个，duplicate_of 指向其所在簇的代表条目，
+    状态设为 duplicate（不再进入待摘要队列）。同一信源的相似标题多为系列文章，不算重复，
+    所以同一块（同一信源）的条目之间不必互相比较：整块的分段只查一次候选、一次写入。
+    每个分段只取最近的 MINHASH_BAND_CANDIDATES 条候选；特征少于 3 个的短标题误判太多，不参与检测。
+
+    条目 ID 按入库顺序递增，窗口的起点即窗口内最早入库条目的 ID：
+    分段索引按它清理，每个分段按 item_id 倒序取最近的候选，都不需要单独的日期列。
+    """
+    window_start = (datetime.fromisoformat(now) - timedelta(days=NEAR_DUP_WINDOW_DAYS)).isoformat()
+    # 本块已插入，窗口内至少有一条
+    window_id = conn.execute(
+        "SELECT id FROM items WHERE discovered_at >= ? ORDER BY discovered_at LIMIT 1", (window_start,)
+    ).fetchone()[0]
+    conn.execute("DELETE FROM minhash_bands WHERE item_id < ?", (window_id,))
+
+    indexed = []
+    by_bucket = {}
+    for item_id, _, title in inserted:
+        features = title_features(title)
+        if len(features) < 3:
+            continue
+        buckets = minhash_buckets(features)
+        indexed.append((item_id, features, buckets))
+        for bucket in buckets:
+            by_bucket.setdefault(bucket, []).append(item_id)
+    if not indexed:
+        return 0
+
+    # 每个分段键各取最近的若干条，再按主键取条目；分段键以 JSON 数组传入，不受参数个数上限限制
+    candidates = {}
+    for bucket, cand_id, cand_title, cand_duplicate_of in conn.execute(
+        """SELECT b.value, i.id, i.title, i.duplicate_of
+           FROM json_each(?) b, items i
+           WHERE i.id IN (SELECT item_id FROM minhash_bands
+                          WHERE bucket = b.value AND item_id >= ? ORDER BY item_id DESC LIMIT ?)
+             AND i.source_id != ? AND i.discovered_at >= ?""",
+        (json.dumps(list(by_bucket)), window_id, MINHASH_BAND_CANDIDATES, source_id, window_start)
+    ):
+        for item_id in by_bucket[bucket]:
+            candidates.setdefault(item_id, {})[cand_id] = (cand_title, cand_duplicate_of)
+
+    marked = []
+    features_of = {}
+    for item_id, features, _ in indexed:
+        best = max(
+            (
+                (jaccard(features, features_of.setdefault(cand_id, title_features(cand_title))),
+                 -cand_id, cand_duplicate_of or cand_id)
+                for cand_id, (cand_title, cand_duplicate_of) in candidates.get(item_id, {}).items()
+            ),
+            default=None
+        )
+        if best and best[0] >= NEAR_DUP_JACCARD:
+            marked.append((best[2], item_id))
+
+    conn.executemany("UPDATE items SET duplicate_of = ?, status = 'duplicate' WHERE id = ?", marked)
+    conn.executemany(
+        "INSERT OR IGNORE INTO minhash_bands (bucket, item_id) VALUES (?, ?)",
+        [(bucket, item_id) for item_id, _, buckets in indexed for bucket in buckets]
+    )
+    return len(marked)
+
+
+def _ingest_chunk(conn: sqlite3.Connection, source_id: str, chunk: list, now: str,
+                  mark_duplicates: bool) -> tuple:
+    inserted = _insert_chunk(conn, source_id, chunk, now)
+    _index_short_titles(conn, inserted)
+    if not mark_duplicates:
+        return inserted, 0
+    return inserted, _index_minhash(conn, source_id, inserted, now)
+
+
+def ingest_items(conn: sqlite3.Connection, source_id: str, items, now: str,
+                 mark_duplicates: bool = False) -> dict:
+    """入库引擎：按 CHUNK_SIZE 分块集合式插入，统计新增与重复
+
+    add_items / add_items_incremental 共用。每块一个事务（被锁时整块重试）。
+    mark_duplicates 时把其他信源近期已有的近似重复条目标记为 duplicate 并写入分段索引
+    （见 _index_minhash）；不检测时也不写分段索引，这些条目不会作为之后入库条目的候选。
+
+    Returns:
+        fetched, added, duplicates, near_duplicates, duplicate_urls（前5个）, latest_date
+    """
+    fetched = 0
+    added = 0
+    near_duplicates = 0
+    duplicate_urls = []  # 只保留前5个
+    latest_date = ""
+
+    for chunk in chunked(items, CHUNK_SIZE):
+        fetched += len(chunk)
+        latest_date = max(
+            [latest_date] + [item["published_at"] for item in chunk if item.get("published_at")]
+        )
+
+        inserted, marked = run_write(conn, _ingest_chunk, conn, source_id, chunk, now, mark_duplicates)
+        added += len(inserted)
+        near_duplicates += marked
+
+        if len(duplicate_urls) < 5 and len(inserted) < len(chunk):
+            new_urls = {row[1] for row in inserted}
+            for item in chunk:
+                if item["url"] in new_urls:
+                    # 同一块内重复出现时，第一次算新增，之后算重复
+                    new_urls.discard(item["url"])
+                elif len(duplicate_urls) < 5:
+                    duplicate_urls.append(item["url"])
+
+    return {
+        "fetched": fetched,
+        "added": added,
+        "duplicates": fetched - added,
+        "near_duplicates": near_duplicates,
+        "duplicate_urls": duplicate_urls,
+        "latest_date": latest_date,
+    }
+
+
+def parse_duration(text: str) -> timedelta:
+    """解析时长：30s / 10m / 2h / 90d，纯数字按秒；格式不对或为负数时抛出 ValueError"""
+    units = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+    value = text.strip().lower()
+    unit = units.get(value[-1:])
+    try:
+        amount = float(value[:-1] if unit else value)
+        if amount >= 0:
+            return timedelta(**{unit or "seconds": amount})
+    except (ValueError, OverflowError):
+        pass
+    raise ValueError(f"Invalid duration {text!r} (use e.g. 30s, 10m, 2h, 90d)")
+
+
+# 插入或更新摘要（用 UPSERT 而不是 INSERT OR REPLACE：REPLACE 的隐式删除不触发计数器触发器）
+UPSERT_SUMMARY_SQL = """INSERT INTO summaries
+    (item_id, summary, relevance_score, relevance_reason, keywords, summarized_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(item_id) DO UPDATE SET
+      summary = excluded.summary,
+      relevance_score = excluded.relevance_score,
+      relevance_reason = excluded.relevance_reason,
+      keywords = excluded.keywords,
+      summarized_at = excluded.summarized_at"""
+
+
+# 标记为已摘要，同时释放 claim-pending 的租约
+SUMMARIZED_SQL = """UPDATE items
+    SET status = 'summarized', lease_owner = NULL, lease_expires = NULL
+    WHERE id = ?"""
+
+
+def _summary_params(item_id: int, data: dict, now: str) -> tuple:
+    return (
+        item_id,
+        data["summary"],
+        data.get("relevance_score"),
+        data.get("relevance_reason"),
+        json.dumps(data.get("keywords", [])),
+        now
+    )
+
+
+def normalize_keyword(keyword) -> str:
+    """关键词索引统一用小写、去首尾空白"""
+    return str(keyword).strip().lower()
+
+
+def _keyword_rows(item_id: int, keywords) -> list:
+    if not isinstance(keywords, list):
+        return []
+    return [(item_id, k) for k in {normalize_keyword(k) for k in keywords} if k]
+
+
+def _write_keywords(conn: sqlite3.Connection, records: list):
+    """用 [(item_id, keywords)] 替换这些条目的关键词索引"""
+    conn.executemany("DELETE FROM item_keywords WHERE item_id = ?", [(item_id,) for item_id, _ in records])
+    conn.executemany(
+        "INSERT OR IGNORE INTO item_keywords (item_id, keyword) VALUES (?, ?)",
+        [row for item_id, keywords in records for row in _keyword_rows(item_id, keywords)]
+    )
+
+
+def _write_short_summaries(conn: sqlite3.Connection, records: list):
+    """用 [(item_id, summary)] 更新这些条目的短词索引"""
+    if _has_short_index(conn):
+        conn.executemany(
+            "UPDATE items_fts_short SET summary = ? WHERE rowid = ?",
+            [(short_grams(summary), item_id) for item_id, summary in records]
+        )
+
+
+def _write_summaries(conn: sqlite3.Connection, records: list, now: str) -> list:
+    """写入一批已校验的 (line_no, item_id, data)，返回失败列表
+
+    正常情况下两条 executemany 写完整批；若整批失败则逐条重试，只记录出错的条目。
+    """
+    summary_rows = [_summary_params(item_id, data, now) for _, item_id, data in records]
+    status_rows = [(item_id,) for _, item_id, _ in records]
+    conn.execute("SAVEPOINT summaries_batch")
+    try:
+        conn.executemany(UPSERT_SUMMARY_SQL, summary_rows)
+        _write_keywords(conn, [(item_id, data.get("keywords", [])) for _, item_id, data in records])
+        _write_short_summaries(conn, [(item_id, data["summary"]) for _, item_id, data in records])
+        conn.executemany(SUMMARIZED_SQL, status_rows)
+        conn.execute("RELEASE summaries_batch")
+        return []
+    except sqlite3.Error:
+        conn.execute("ROLLBACK TO summaries_batch")
+        conn.execute("RELEASE summaries_batch")
+
+    failures = []
+    for (line_no, item_id, data), summary_row in zip(records, summary_rows):
+        conn.execute("SAVEPOINT summaries_item")
+        try:
+            conn.execute(UPSERT_SUMMARY_SQL, summary_row)
+            _write_keywords(conn, [(item_id, data.get("keywords", []))])
+            _write_short_summaries(conn, [(item_id, data["summary"])])
+            conn.execute(SUMMARIZED_SQL, (item_id,))
+            conn.execute("RELEASE summaries_item")
+        except sqlite3.Error as e:
+            conn.execute("ROLLBACK TO summaries_item")
+            conn.execute("RELEASE summaries_item")
+            failures.append({"line": line_no, "id": item_id, "error": str(e)})
+    return failures
+
+
+def _item_row(row: sqlite3.Row) -> dict:
+    """条目查询结果转 dict，并解析 keywords JSON"""
+    item = dict(row)
+    if item.get("keywords"):
+        try:
+            item["keywords"] = json.loads(item["keywords"])
+        except json.JSONDecodeError:
+            item["keywords"] = []
+    return item
+
+
+def collapse_duplicates(items: list) -> list:
+    """把近似重复条目折叠进其代表条目的 duplicates 列表
+
+    代表条目不在 items 中（如前几天已入库）时，重复条目原样保留，带 duplicate_of 字段。
+    """
+    by_id = {item["id"]: item for item in items}
+    collapsed = []
+    for item in items:
+        root = by_id.get(item.get("duplicate_of"))
+        if root is None:
+            collapsed.append(item)
+        else:
+            root.setdefault("duplicates", []).append(
+                {key: item[key] for key in ("id", "source_id", "url", "title")}
+            )
+    return collapsed
+
+
+def _range_query(schemas: list, where: str = "") -> str:
+    """日期范围查询；多个 schema（主库 + 已 ATTACH 的归档库）用 UNION ALL 合并"""
+    return "\nUNION ALL\n".join(
+        f"""SELECT
+              i.id, i.source_id, i.url, i.title, i.published_at, i.discovered_at, i.status,
+              i.duplicate_of, s.summary, s.relevance_score, s.relevance_reason, s.keywords
+            FROM {schema}.items i
+            LEFT JOIN {schema}.summaries s ON i.id = s.item_id
+            WHERE i.discovered_at >= ? AND i.discovered_at < ?{where}"""
+        for schema in schemas
+    )
+
+
+# 日报摘编一天内的条目：倒序走 idx_daily_digest_rank，已按星级、分数、发现时间排好，无需排序
+DIGEST_ORDER_SQL = "ORDER BY tier DESC, score DESC, discovered_at DESC"
+
+# 星级分组及名称（与 references/prompts/report.md 一致）
+DIGEST_TIERS = [(5, "五星推荐"), (4, "四星推荐"), (3, "值得一看"), (0, "其他")]
+
+
+# ==================== 增量抓取相关功能 ====================
+
+class UrlFilter:
+    """已知 URL 哈希的有序文件，存放在 news.db 旁（<db>.urls.idx），mmap 后二分查找，不整体加载
+
+    文件内容是 items.url_hash 及 archived_urls 的 int64 数组：前面是有序的主体，之后新增的哈希
+    先无序追加在末尾，累积到主体的 1/TAIL_RATIO 时合并重排。url_hash 是去重的唯一键，条目只会经归档删除
+    （哈希留在 archived_urls），所以命中即已存在、未命中即不存在，都不必回库确认。
+
+    文件头记录已收录到的 items 自增序号：打开时补入其他进程之后新增的条目，库被替换（序号变小）时重建；
+    归档后由 NewsDB.archive 删除文件，下次打开时重建。写文件时持有 fcntl.flock 排他锁，
+    探测期间持有共享锁，多个进程同时打开、补入互不干扰。
+    """
+
+    MAGIC = b"DNUF3\0\0\0"
+    HEADER = struct.Struct("<8sqqq")  # magic, max_id, 有序主体条数, 末尾追加条数
+    TAIL_RATIO = 8
+
+    def __init__(self, f, header: tuple):
+        self.file = f
+        _, self.max_id, base_count, tail_count = header
+        self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.mmap)
+        start = self.HEADER.size
+        self.base = view[start:start + base_count * 8].cast("q")
+        self.tail = set(view[start + base_count * 8:start + (base_count + tail_count) * 8].cast("q"))
+        view.release()
+
+    def __contains__(self, key: int) -> bool:
+        i = bisect.bisect_left(self.base, key)
+        return i < len(self.base) and self.base[i] == key or key in self.tail
+
+    def close(self):
+        self.base.release()
+        self.mmap.close()
+        self.file.close()
+
+    @staticmethod
+    def path(db_path: str) -> Path:
+        return Path(f"{db_path}.urls.idx")
+
+    @classmethod
+    def open(cls, conn: sqlite3.Connection, db_path: str):
+        """打开过滤器并补入新增条目，文件缺失或损坏时从库重建；不支持 flock 的平台返回 None（直接查库）"""
+        if fcntl is None:
+            return None
+        # 不带缓冲：加锁后重新读到的必须是其他进程刚写入的内容
+        f = os.fdopen(os.open(cls.path(db_path), os.O_RDWR | os.O_CREAT, 0o644), "r+b", buffering=0)
+        try:
+            fcntl.flock(f, fcntl.LOCK_SH)
+            seq = _items_sequence(conn)
+            header = cls._read_header(f)
+            if header is None or header[1] != seq:
+                # 升级为排他锁后重新读取，其他进程可能刚补入过
+                fcntl.flock(f, fcntl.LOCK_EX)
+                header = cls._update(f, conn, cls._read_header(f))
+                fcntl.flock(f, fcntl.LOCK_SH)
+                header = cls._read_header(f)
+            return cls(f, header)
+        except BaseException:
+            f.close()
+            raise
+
+    @classmethod
+    def _read_header(cls, f) -> tuple:
+        """读取并校验文件头，文件为空或损坏时返回 None"""
+        f.seek(0)
+        data = f.read(cls.HEADER.size)
+        if len(data) < cls.HEADER.size:
+            return None
+        header = cls.HEADER.unpack(data)
+        size = os.fstat(f.fileno()).st_size
+        if header[0] != cls.MAGIC or min(header[1:]) < 0 or cls.HEADER.size + (header[2] + header[3]) * 8 > size:
+            return None
+        return header
+
+    @classmethod
+    def _update(cls, f, conn: sqlite3.Connection, header: tuple) -> tuple:
+        """（持有排他锁）补入 header 之后新增的条目，或整体重建；先写数据，最后写文件头"""
+        # 先读序号再查条目：查询看到的条目不会少于序号所示
+        seq = _items_sequence(conn)
+        if header is not None and header[1] > seq:
+            header = None
+        if header is not None and header[1] == seq:
+            return header
+
+        if header is None:
+            hashes = array("q", (row[0] for row in conn.execute("SELECT url_hash FROM archived_urls")))
+            hashes.extend(row[0] for row in conn.execute("SELECT url_hash FROM items WHERE url_hash IS NOT NULL"))
+            base, tail = sorted(hashes), []
+        else:
+            _, max_id, base_count, tail_count = header
+            tail = [row[0] for row in conn.execute(
+                "SELECT url_hash FROM items WHERE id > ? AND url_hash IS NOT NULL", (max_id,)
+            )]
+            base = None
+            if tail_count + len(tail) > max(base_count // cls.TAIL_RATIO, CHUNK_SIZE):
+                f.seek(cls.HEADER.size)
+                old = array("q")
+                old.frombytes(f.read((base_count + tail_count) * 8))
+                base, tail = sorted(old + array("q", tail)), []
+            else:
+                f.seek(cls.HEADER.size + (base_count + tail_count) * 8)
+                f.write(array("q", tail).tobytes())
+                tail_count += len(tail)
+
+        if base is not None:
+            # 重写主体前先作废文件头，中途崩溃时下次打开会重建
+            f.seek(0)
+            f.write(bytes(cls.HEADER.size))
+            f.flush()
+            f.seek(cls.HEADER.size)
+            f.write(array("q", base).tobytes())
+            f.truncate()
+            base_count, tail_count = len(base), 0
+        f.flush()
+        header = (cls.MAGIC, seq, base_count, tail_count)
+        f.seek(0)
+        f.write(cls.HEADER.pack(*header))
+        f.flush()
+        return header
+
+
+def _items_sequence(conn: sqlite3.Connection) -> int:
+    """items 的自增序号（AUTOINCREMENT，删除条目后也不回退）"""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'items'").fetchone()
+    return row[0] if row else 0
+
+
+def _record_sync(conn: sqlite3.Connection, source_id: str, ingested: dict,
+                 date_range_start: str, now: str, date_range_end: str = None, items_skipped: int = 0):
+    """写入一条同步日志，并更新 source_status
+
+    items_skipped 为抓取时按日期范围过滤掉的条目数（见 rss.py --since/--until）。
+    """
+    conn.execute(
+        """INSERT INTO source_sync_log
+           (source_id, sync_date, items_fetched, items_new, items_duplicate, items_skipped,
+            latest_item_date, date_range_start, date_range_end, created_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (source_id, now[:10], ingested["fetched"], ingested["added"], ingested["duplicates"],
+         items_skipped, ingested["latest_date"], date_range_start, date_range_end, now)
+    )
+
+    # 累计数取自触发器维护的计数器
+    row = conn.execute(
+        "SELECT total_items FROM source_counters WHERE source_id = ?",
+        (source_id,)
+    ).fetchone()
+    total_fetched = row[0] if row else 0
+
+    conn.execute(
+        """INSERT INTO source_status (source_id, last_fetched_date, last_fetched_count,
+           total_items_fetched, updated_at)
+           VALUES (?, ?, ?, ?, ?)
+           ON CONFLICT(source_id) DO UPDATE SET
+           last_fetched_date = excluded.last_fetched_date,
+           last_fetched_count = excluded.last_fetched_count,
+           total_items_fetched = excluded.total_items_fetched,
+           updated_at = excluded.updated_at""",
+        (source_id, now[:10], ingested["added"], total_fetched, now)
+    )
+
+
+# ==================== 归档与压缩 ====================
+
+# 归档库结构：与主库同名同列，不含计数器、全文索引和触发器
+ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {schema}.items (
+    id INTEGER PRIMARY KEY,
+    source_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    published_at TEXT,
+    discovered_at TEXT NOT NULL,
+    status TEXT,
+    url_hash INTEGER,
+    duplicate_of INTEGER
+);
+CREATE INDEX IF NOT EXISTS {schema}.idx_items_discovered ON items(discovered_at);
+
+CREATE TABLE IF NOT EXISTS {schema}.summaries (
+    item_id INTEGER PRIMARY KEY,
+    summary TEXT NOT NULL,
+    relevance_score INTEGER,
+    relevance_reason TEXT,
+    keywords TEXT,
+    summarized_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS {schema}.item_keywords (
+    item_id INTEGER NOT NULL,
+    keyword TEXT NOT NULL,
+    PRIMARY KEY (item_id, keyword)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS {schema}.idx_item_keywords_keyword ON item_keywords(keyword, item_id);
+
+CREATE TABLE IF NOT EXISTS {schema}.source_sync_log (
+    id INTEGER PRIMARY KEY,
+    source_id TEXT NOT NULL,
+    sync_date TEXT NOT NULL,
+    items_fetched INTEGER DEFAULT 0,
+    items_new INTEGER DEFAULT 0,
+    items_duplicate INTEGER DEFAULT 0,
+    items_skipped INTEGER DEFAULT 0,
+    latest_item_date TEXT,
+    date_range_start TEXT,
+    date_range_end TEXT,
+    created_at TEXT NOT NULL
+);
+"""
+
+
+def archive_path(db_path: str, year: str) -> Path:
+    """某年的归档库路径：news.db -> news-archive-2025.db"""
+    path = Path(db_path)
+    return path.with_name(f"{path.stem}-archive-{year}{path.suffix}")
+
+
+def attach_archives(conn: sqlite3.Connection, db_path: str, from_date: str, to_date: str = None) -> list:
+    """ATTACH 日期范围内各年份已存在的归档库，返回要查询的 schema 列表（含 main）"""
+    schemas = ["main"]
+    attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+    for year in range(int(from_date[:4]), int((to_date or date.today().isoformat())[:4]) + 1):
+        schema = f"archive_{year}"
+        path = archive_path(db_path, str(year))
+        if schema not in attached:
+            if not path.exists():
+                continue
+            conn.execute("ATTACH DATABASE ? AS " + schema, (str(path),))
+        schemas.append(schema)
+    return schemas
+
+
+def _archive_year(conn: sqlite3.Connection, year: str, cutoff: str) -> dict:
+    """把某一年早于 cutoff 的条目和同步日志移入已 ATTACH 为 archive 的归档库
+
+    待处理（pending）条目不归档，留给摘要流程。
+    """
+    _execute_script(conn, ARCHIVE_SCHEMA.format(schema="archive"))
+    end = min(cutoff, f"{int(year) + 1}-01-01")
+    where = "discovered_at >= ? AND discovered_at < ? AND status != 'pending'"
+    params = (f"{year}-01-01", end)
+    selected = f"SELECT id FROM main.items WHERE {where}"
+
+    conn.execute(
+        f"""INSERT OR IGNORE INTO archive.items
+              (id, source_id, url, title, published_at, discovered_at, status, url_hash, duplicate_of)
+            SELECT id, source_id, url, title, published_at, discovered_at, status, url_hash, duplicate_of
+            FROM main.items WHERE {where}""",
+        params
+    )
+    conn.execute(
+        f"INSERT OR IGNORE INTO archive.summaries SELECT * FROM main.summaries WHERE item_id IN ({selected})",
+        params
+    )
+    conn.execute(
+        f"INSERT OR IGNORE INTO archive.item_keywords SELECT * FROM main.item_keywords WHERE item_id IN ({selected})",
+        params
+    )
+    conn.execute(
+        f"INSERT OR IGNORE INTO main.archived_urls SELECT url_hash FROM main.items WHERE {where} AND url_hash IS NOT NULL",
+        params
+    )
+    # 删除摘要会经触发器清理 item_keywords / 计数器 / 全文索引；删除条目同理
+    conn.execute(f"DELETE FROM main.summaries WHERE item_id IN ({selected})", params)
+    items = conn.execute(f"DELETE FROM main.items WHERE {where}", params).rowcount
+
+    log_params = (f"{year}-01-01", end)
+    conn.execute(
+        """INSERT OR IGNORE INTO archive.source_sync_log
+           SELECT * FROM main.source_sync_log WHERE sync_date >= ? AND sync_date < ?""",
+        log_params
+    )
+    sync_log = conn.execute(
+        "DELETE FROM main.source_sync_log WHERE sync_date >= ? AND sync_date < ?", log_params
+    ).rowcount
+
+    return {"year": year, "items": items, "sync_log": sync_log}
+
+
+def compact(conn: sqlite3.Connection) -> dict:
+    """回收空闲页、更新统计信息并截断 WAL
+
+    旧库（auto_vacuum=NONE）第一次执行完整 VACUUM 以切换到增量模式，之后只做增量 VACUUM。
+    """
+    conn.commit()
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    before = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        mode = "incremental"
+        conn.execute("PRAGMA incremental_vacuum").fetchall()
+    else:
+        mode = "full"
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    after = conn.execute("PRAGMA page_count").fetchone()[0]
+    return {
+        "vacuum": mode,
+        "freelist_pages": freelist,
+        "size_before": before * page_size,
+        "size_after": after * page_size,
+    }
+
+
+class NewsDB:
+    """持有一个连接的数据库对象，方法与 db.py 的子命令一一对应
+
+    整个生命周期共用一个连接：sqlite3 按连接缓存预编译语句（cached_statements），
+    同一条 SQL 再次执行时直接复用，不再重复解析和生成查询计划。
+    写操作各自提交；conn 可以传入外部连接（如 batch 的会话连接），此时提交和关闭由调用方负责。
+    """
+
+    def __init__(self, path: str, conn: sqlite3.Connection = None):
+        self.path = str(path)
+        if conn is None:
+            conn = connect(self.path)
+            ensure_schema(conn, self.path)
+        self.conn = conn
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def recount(self) -> dict:
+        """重建计数器（手动修改数据库后使用）"""
+        conn = self.conn
+        _recount(conn)
+
+        # source_status 表中的累计数也一并校正
+        conn.execute(
+            """UPDATE source_status SET total_items_fetched = coalesce(
+                 (SELECT total_items FROM source_counters c WHERE c.source_id = source_status.source_id), 0)"""
+        )
+
+        # 日报摘编从 summaries 重建，计数由触发器随插入重新累加
+        conn.execute("DELETE FROM daily_digest")
+        conn.execute("DELETE FROM daily_digest_counts")
+        conn.execute(
+            DIGEST_INSERT_SQL.format(tier=DIGEST_TIER_SQL.format(score="s.relevance_score"), s="s")
+            + "\nFROM summaries s JOIN items i ON i.id = s.item_id"
+        )
+
+        sources = conn.execute("SELECT COUNT(*) FROM source_counters").fetchone()[0]
+        conn.commit()
+
+        return {"status": "recounted", "sources": sources}
+
+    def add_items(self, source_id: str, items) -> dict:
+        """添加条目（自动去重）
+
+        items 可以是列表或任意可迭代对象（如 iter_ndjson 的结果），按 CHUNK_SIZE 分块入库。
+        """
+        conn = self.conn
+        now = datetime.now().isoformat()
+
+        ingested = ingest_items(conn, source_id, items, now)
+
+        return {
+            "status": "ok",
+            "source_id": source_id,
+            "added": ingested["added"],
+            "skipped": ingested["duplicates"],
+            "total": ingested["fetched"]
+        }
+
+    def list_pending(self, limit: int = 10) -> list:
+        """列出待处理条目"""
+        conn = self.conn
+        rows = conn.execute(
+            """SELECT id, source_id, url, title, published_at, discovered_at
+               FROM items
+               WHERE status = 'pending'
+               ORDER BY discovered_at DESC
+               LIMIT ?""",
+            (limit,)
+        ).fetchall()
+
+        return [dict(r) for r in rows]
+
+    def claim_pending(self, worker: str, lease: str = "10m", limit: int = 10) -> list:
+        """为 worker 领取一批待处理条目（原子操作）
+
+        领取 pending 条目以及租约已过期的 in_progress 条目，标记为 in_progress 并写入租约；
+        update-summary 完成后释放租约。多个 worker 并行时不会拿到同一条目。
+        """
+        conn = self.conn
+        now = datetime.now()
+        expires = (now + parse_duration(lease)).isoformat()
+
+        def claim():
+            return conn.execute(
+                """UPDATE items
+                   SET status = 'in_progress', lease_owner = ?, lease_expires = ?
+                   WHERE id IN (
+                     SELECT id FROM items
+                     WHERE status = 'pending'
+                        OR (status = 'in_progress' AND lease_expires < ?)
+                     ORDER BY discovered_at DESC
+                     LIMIT ?
+                   )
+                   RETURNING id, source_id, url, title, published_at, discovered_at, lease_expires""",
+                (worker, expires, now.isoformat(), limit)
+            ).fetchall()
+
+        rows = run_write(conn, claim)
+
+        return sorted((dict(r) for r in rows), key=lambda r: r["discovered_at"], reverse=True)
+
+    def release_leases(self, worker: str, ids: list = None) -> dict:
+        """放弃 worker 持有的租约，条目退回 pending（ids 为空时放弃全部）"""
+        conn = self.conn
+        sql = """UPDATE items
+                 SET status = 'pending', lease_owner = NULL, lease_expires = NULL
+                 WHERE status = 'in_progress' AND lease_owner = ?"""
+        params = [worker]
+        if ids:
+            sql += f" AND id IN ({','.join(['?' for _ in ids])})"
+            params += ids
+
+        released = run_write(conn, lambda: conn.execute(sql, params).rowcount)
+
+        return {"status": "ok", "worker": worker, "released": released}
+
+    def list_pending_by_date(self, from_date: str, to_date: str = None, limit: int = 50) -> list:
+        """
+        按日期范围列出待处理条目（兜底过滤）
+
+        Args:
+            from_date: 开始日期 (YYYY-MM-DD)
+            to_date: 结束日期 (YYYY-MM-DD)，默认今天
+            limit: 最大条数
+        """
+        conn = self.conn
+
+        if to_date is None:
+            to_date = date.today().isoformat()
+
+        rows = conn.execute(
+            """SELECT id, source_id, url, title, published_at, discovered_at
+               FROM items
+               WHERE status = 'pending'
+                 AND (published_at IS NULL OR (published_at >= ? AND published_at < ?))
+               ORDER BY published_at DESC NULLS LAST, discovered_at DESC
+               LIMIT ?""",
+            (*day_range(from_date, to_date), limit)
+        ).fetchall()
+
+        return [dict(r) for r in rows]
+
+    def update_summary(self, item_id: int, data: dict) -> dict:
+        """更新摘要"""
+        conn = self.conn
+        now = datetime.now().isoformat()
+
+        def write():
+            conn.execute(UPSERT_SUMMARY_SQL, _summary_params(item_id, data, now))
+            _write_keywords(conn, [(item_id, data.get("keywords", []))])
+            _write_short_summaries(conn, [(item_id, data["summary"])])
+
+            # 更新条目状态
+            conn.execute(
+                SUMMARIZED_SQL,
+                (item_id,)
+            )
+
+        run_write(conn, write)
+
+        return {"status": "ok", "item_id": item_id}
+
+    def update_summaries(self, lines, batch_size: int = 200) -> dict:
+        """批量更新摘要
+
+        lines 为 NDJSON 行的可迭代对象，每行 {"id": ..., "summary": ..., "relevance_score": ..., ...}，
+        其余字段同 update-summary 的 --data。每 batch_size 条一个事务；
+        格式错误、缺少字段或条目不存在的行记入 failures，不影响同批其他条目。
+        """
+        conn = self.conn
+        now = datetime.now().isoformat()
+
+        updated = 0
+        failures = []
+
+        numbered = ((n, line.strip()) for n, line in enumerate(lines, 1))
+        for batch in chunked(((n, line) for n, line in numbered if line), batch_size):
+            records = []
+            for line_no, line in batch:
+                try:
+                    data = json.loads(line)
+                    item_id = int(data["id"])
+                    if not isinstance(data.get("summary"), str):
+                        raise ValueError("missing summary")
+                    records.append((line_no, item_id, data))
+                except (ValueError, KeyError, TypeError) as e:
+                    failures.append({"line": line_no, "error": f"{type(e).__name__}: {e}"})
+
+            # 条目必须存在（summaries 的外键默认不强制）
+            if records:
+                ids = list({item_id for _, item_id, _ in records})
+                placeholders = ','.join(['?' for _ in ids])
+                known = {
+                    row[0] for row in
+                    conn.execute(f"SELECT id FROM items WHERE id IN ({placeholders})", ids)
+                }
+                for line_no, item_id, _ in records:
+                    if item_id not in known:
+                        failures.append({"line": line_no, "id": item_id, "error": "item not found"})
+                records = [r for r in records if r[1] in known]
+
+            batch_failures = run_write(conn, _write_summaries, conn, records, now)
+            failures += batch_failures
+            updated += len(records) - len(batch_failures)
+
+        return {
+            "status": "ok" if not failures else "partial",
+            "updated": updated,
+            "failed": len(failures),
+            "failures": failures
+        }
+
+    def list_today(self) -> list:
+        """列出今日内容（含摘要），近似重复条目折叠到代表条目下
+
+        已摘要的条目直接读 daily_digest 中排好序的一天，尚未摘要的（待处理、近似重复）排在其后。
+        """
+        conn = self.conn
+        today = date.today().isoformat()
+
+        rows = conn.execute(
+            f"""SELECT
+                  item_id AS id, source_id, url, title, published_at, discovered_at,
+                  'summarized' AS status, duplicate_of, summary, relevance_score, relevance_reason, keywords
+                FROM daily_digest WHERE day = ?
+                {DIGEST_ORDER_SQL}""",
+            (today,)
+        ).fetchall()
+        rows += conn.execute(
+            _range_query(["main"], " AND s.item_id IS NULL") + "\nORDER BY discovered_at DESC",
+            day_range(today)
+        ).fetchall()
+
+        return collapse_duplicates([_item_row(r) for r in rows])
+
+    def digest(self, day: str = None) -> dict:
+        """某天（默认今天）的日报摘编：已摘要条目按星级分组，组内已排好序
+
+        分组与日报结构一致（五星推荐 / 四星推荐 / 值得一看 / 其他），空组不出现；
+        条数来自 daily_digest_counts，不必数行。
+        """
+        conn = self.conn
+        day = day or date.today().isoformat()
+
+        counts = dict(conn.execute(
+            "SELECT tier, items FROM daily_digest_counts WHERE day = ? AND items > 0", (day,)
+        ).fetchall())
+        items = {}
+        for row in conn.execute(
+            f"""SELECT tier, item_id AS id, source_id, url, title, published_at, summary, relevance_score
+                FROM daily_digest WHERE day = ?
+                {DIGEST_ORDER_SQL}""",
+            (day,)
+        ):
+            item = dict(row)
+            items.setdefault(item.pop("tier"), []).append(item)
+
+        return {
+            "date": day,
+            "total": sum(counts.values()),
+            "high_relevance_count": counts.get(5, 0) + counts.get(4, 0),
+            "tiers": [
+                {"tier": tier, "name": name, "count": counts.get(tier, 0), "items": items[tier]}
+                for tier, name in DIGEST_TIERS if tier in items
+            ],
+        }
+
+    def list_range(self, from_date: str, to_date: str, include_archive: bool = False) -> list:
+        """列出日期范围内容（含摘要），近似重复条目折叠到代表条目下
+
+        include_archive 时一并查询范围内年份的归档库。
+        """
+        conn = self.conn
+        schemas = attach_archives(conn, self.path, from_date, to_date) if include_archive else ["main"]
+
+        rows = conn.execute(
+            _range_query(schemas) + "\nORDER BY relevance_score DESC NULLS LAST, discovered_at DESC",
+            [*day_range(from_date, to_date)] * len(schemas)
+        ).fetchall()
+
+        return collapse_duplicates([_item_row(r) for r in rows])
+
+    def iter_range(self, from_date: str, to_date: str, after_id: int = 0, limit: int = None,
+                   include_archive: bool = False):
+        """按入库时间顺序（discovered_at, id）逐行产出日期范围内容（含摘要）
+
+        直接迭代游标，不 fetchall，内存占用与范围大小无关；
+        after_id 为上一页最后一条的 id（keyset 分页）：取出它的 discovered_at，从 (discovered_at, id)
+        之后接着读。idx_items_discovered 的索引项本身就是 (discovered_at, rowid)，既能直接定位到游标，
+        又能按序输出，不需要为排序建临时 B 树，每页的开销与页码无关。
+        归档时条目保留原 id 和 discovered_at，所以合并归档库后 keyset 分页依然成立。
+        """
+        conn = self.conn
+        schemas = attach_archives(conn, self.path, from_date, to_date) if include_archive else ["main"]
+        start, end = day_range(from_date, to_date)
+        where = ""
+        cursor = []
+        if after_id:
+            row = conn.execute(
+                " UNION ALL ".join(f"SELECT discovered_at FROM {schema}.items WHERE id = ?" for schema in schemas),
+                [after_id] * len(schemas)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Unknown --after-id {after_id}")
+            # 游标在范围内时从游标处开始查找，而不是从范围起点逐项跳过前面的页
+            start = max(start, row[0])
+            where = " AND (i.discovered_at, i.id) > (?, ?)"
+            cursor = [row[0], after_id]
+        sql = _range_query(schemas, where) + "\nORDER BY discovered_at, id"
+        params = [start, end, *cursor] * len(schemas)
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        for row in conn.execute(sql, params):
+            yield _item_row(row)
+
+    def list_range_page(self, from_date: str, to_date: str, after_id: int = 0,
+                        page_size: int = 500, include_archive: bool = False) -> dict:
+        """分页列出日期范围内容，next_after_id 为下一页的游标（没有更多时为 None）"""
+        items = list(self.iter_range(from_date, to_date, after_id, page_size, include_archive))
+        next_after_id = items[-1]["id"] if len(items) == page_size else None
+        return {"items": items, "next_after_id": next_after_id}
+
+    def list_by_keyword(self, keyword: str, from_date: str = None, to_date: str = None,
+                        limit: int = 50) -> list:
+        """按关键词列出条目（含摘要），可限定发现日期范围"""
+        conn = self.conn
+
+        sql = """SELECT
+                   i.id, i.source_id, i.url, i.title, i.published_at, i.discovered_at, i.status,
+                   s.summary, s.relevance_score, s.relevance_reason, s.keywords
+                 FROM item_keywords k
+                 JOIN items i ON i.id = k.item_id
+                 LEFT JOIN summaries s ON s.item_id = k.item_id
+                 WHERE k.keyword = ?"""
+        params = [normalize_keyword(keyword)]
+        if from_date:
+            sql += " AND i.discovered_at >= ? AND i.discovered_at < ?"
+            params += day_range(from_date, to_date or date.today().isoformat())
+        sql += " ORDER BY i.discovered_at DESC LIMIT ?"
+        params.append(limit)
+
+        rows = conn.execute(sql, params).fetchall()
+
+        return [_item_row(r) for r in rows]
+
+    def keyword_stats(self, from_date: str = None, to_date: str = None,
+                      keyword: str = None, limit: int = 20) -> list:
+        """关键词出现次数（按条目计），可限定发现日期范围或只统计单个关键词"""
+        conn = self.conn
+
+        sql = """SELECT k.keyword, COUNT(*) AS count,
+                   MIN(i.discovered_at) AS first_seen, MAX(i.discovered_at) AS last_seen
+                 FROM item_keywords k
+                 JOIN items i ON i.id = k.item_id
+                 WHERE 1 = 1"""
+        params = []
+        if keyword:
+            sql += " AND k.keyword = ?"
+            params.append(normalize_keyword(keyword))
+        if from_date:
+            sql += " AND i.discovered_at >= ? AND i.discovered_at < ?"
+            params += day_range(from_date, to_date or date.today().isoformat())
+        sql += " GROUP BY k.keyword ORDER BY count DESC, k.keyword LIMIT ?"
+        params.append(limit)
+
+        rows = conn.execute(sql, params).fetchall()
+
+        return [dict(r) for r in rows]
+
+    def search(self, query: str, from_date: str = None, to_date: str = None,
+               source_id: str = None, limit: int = 20) -> list:
+        """全文搜索标题和摘要，按 BM25 相关度排序并返回摘录
+
+        空格分隔的多个词为 AND 关系。3 个字符以上的词走 trigram 索引；更短的词走
+        items_fts_short：两字中文词按相邻两字匹配，单个汉字按前缀匹配，两字符英文/数字
+        按整词匹配（"AI" 不再命中 "said"）。不能完全靠索引判定的短词（如 "A股"、"C#"）
+        只在其他词筛出的候选集上做 LIKE；所有词都不可索引时（如单个字母）才退化为全表 LIKE。
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        long_terms = [t for t in terms if len(t) >= 3]
+        short_terms = [t for t in terms if len(t) < 3]
+        short_queries = [q for q in map(_short_term_query, short_terms) if q]
+
+        if long_terms:
+            select = """snippet(items_fts, -1, '[', ']', '…', 32) AS snippet,
+                        round(bm25(items_fts), 4) AS score"""
+            where = ["items_fts MATCH ?"]
+            params = [" ".join(_fts_phrase(t) for t in long_terms)]
+            order = "score"
+        else:
+            select = "coalesce(nullif(substr(f.summary, 1, 80), ''), f.title) AS snippet, NULL AS score"
+            where = []
+            params = []
+            order = "i.discovered_at DESC"
+
+        if short_queries:
+            # 有长词时由 trigram MATCH 驱动，短词索引只做过滤（+ 阻止按 rowid 逐个回查 MATCH）
+            rowid = "+f.rowid" if long_terms else "f.rowid"
+            where.append(f"{rowid} IN (SELECT rowid FROM items_fts_short WHERE items_fts_short MATCH ?)")
+            params.append(" ".join(short_queries))
+        for term in short_terms:
+            if _short_term_query(term, exact_only=True):
+                continue
+            where.append("(f.title LIKE ? OR f.summary LIKE ?)")
+            params += [f"%{term}%", f"%{term}%"]
+        if from_date:
+            where.append("i.discovered_at >= ? AND i.discovered_at < ?")
+            params += day_range(from_date, to_date or date.today().isoformat())
+        if source_id:
+            where.append("i.source_id = ?")
+            params.append(source_id)
+        params.append(limit)
+
+        conn = self.conn
+        rows = conn.execute(
+            f"""SELECT i.id, i.source_id, i.url, i.title, i.published_at, i.discovered_at,
+                  s.relevance_score, {select}
+                FROM items_fts f
+                JOIN items i ON i.id = f.rowid
+                LEFT JOIN summaries s ON s.item_id = i.id
+                WHERE {" AND ".join(where)}
+                ORDER BY {order}
+                LIMIT ?""",
+            params
+        ).fetchall()
+
+        return [dict(r) for r in rows]
+
+    def last_report(self) -> dict:
+        """获取上次日报信息"""
+        conn = self.conn
+        row = conn.execute(
+            """SELECT date, item_count, high_relevance_count, created_at, file_path
+               FROM reports
+               ORDER BY date DESC
+               LIMIT 1"""
+        ).fetchone()
+
+        if row:
+            return dict(row)
+        return {"date": None, "message": "No reports found"}
+
+    def list_sources(self) -> list:
+        """列出所有信源及统计"""
+        conn = self.conn
+        rows = conn.execute(
+            """SELECT source_id, total_items, pending_count, last_discovered
+               FROM source_counters
+               WHERE total_items > 0
+               ORDER BY last_discovered DESC"""
+        ).fetchall()
+
+        return [dict(r) for r in rows]
+
+    def stats(self) -> dict:
+        """统计信息"""
+        conn = self.conn
+
+        # 按状态统计（计数器表，触发器维护）
+        status_counts = {}
+        for row in conn.execute(
+            "SELECT substr(name, 8), value FROM stat_counters WHERE name LIKE 'status:%' AND value > 0"
+        ):
+            status_counts[row[0]] = row[1]
+
+        # 总条目数
+        total = sum(status_counts.values())
+
+        # 今日新增
+        today = date.today().isoformat()
+        today_count = conn.execute(
+            "SELECT COUNT(*) FROM items WHERE discovered_at >= ? AND discovered_at < ?",
+            day_range(today)
+        ).fetchone()[0]
+
+        # 信源数
+        source_count = conn.execute(
+            "SELECT COUNT(*) FROM source_counters WHERE total_items > 0"
+        ).fetchone()[0]
+
+        # 高相关内容数（4-5星）
+        row = conn.execute(
+            "SELECT value FROM stat_counters WHERE name = 'high_relevance'"
+        ).fetchone()
+        high_relevance = row[0] if row else 0
+
+        return {
+            "total_items": total,
+            "status_counts": status_counts,
+            "today_count": today_count,
+            "source_count": source_count,
+            "high_relevance_count": high_relevance
+        }
+
+    def record_report(self, report_date: str, item_count: int, high_count: int, file_path: str) -> dict:
+        """记录日报
+
+        item_count / high_count 为 None 时取 daily_digest_counts 中当天的已摘要条数和 4-5 星条数。
+        """
+        conn = self.conn
+        now = datetime.now().isoformat()
+
+        if item_count is None or high_count is None:
+            counts = dict(conn.execute(
+                "SELECT tier, items FROM daily_digest_counts WHERE day = ?", (report_date,)
+            ).fetchall())
+            if item_count is None:
+                item_count = sum(counts.values())
+            if high_count is None:
+                high_count = counts.get(5, 0) + counts.get(4, 0)
+
+        try:
+            conn.execute(
+                """INSERT INTO reports (date, item_count, high_relevance_count, created_at, file_path)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (report_date, item_count, high_count, now, file_path)
+            )
+            conn.commit()
+            status = "created"
+        except sqlite3.IntegrityError:
+            # 已存在，更新
+            conn.execute(
+                """UPDATE reports
+                   SET item_count = ?, high_relevance_count = ?, created_at = ?, file_path = ?
+                   WHERE date = ?""",
+                (item_count, high_count, now, file_path, report_date)
+            )
+            conn.commit()
+            status = "updated"
+
+        return {"status": status, "date": report_date, "item_count": item_count,
+                "high_relevance_count": high_count}
+
+    def check_existing_urls(self, urls, use_filter: bool = False) -> set:
+        """批量检查 URL 是否已存在（按规范化 URL 比较，见 canonicalize_url）
+
+        按 CHUNK_SIZE 分块查询，不受 SQLite 参数个数上限限制。
+
+        Args:
+            urls: 要检查的 URL 列表（或可迭代对象）
+            use_filter: 用 news.db 旁的 URL 哈希文件判定（见 UrlFilter），不查 items 表
+
+        Returns:
+            已存在的 URL 集合（返回输入中的原始 URL）
+        """
+        conn = self.conn
+        url_filter = UrlFilter.open(conn, self.path) if use_filter else None
+
+        existing = set()
+        try:
+            for chunk in chunked(urls, CHUNK_SIZE):
+                by_hash = {}
+                for url in chunk:
+                    by_hash.setdefault(url_hash(url), []).append(url)
+                if url_filter is not None:
+                    for key, key_urls in by_hash.items():
+                        if key in url_filter:
+                            existing.update(key_urls)
+                    continue
+                placeholders = ','.join(['?' for _ in by_hash])
+                rows = conn.execute(
+                    f"""SELECT url_hash FROM items WHERE url_hash IN ({placeholders})
+                        UNION ALL
+                        SELECT url_hash FROM archived_urls WHERE url_hash IN ({placeholders})""",
+                    tuple(by_hash) * 2
+                ).fetchall()
+                for row in rows:
+                    existing.update(by_hash[row[0]])
+        finally:
+            if url_filter is not None:
+                url_filter.close()
+
+        return existing
+
+    def add_items_incremental(self, source_id: str, items, date_range_start: str = None,
+                              date_range_end: str = None, items_skipped: int = 0) -> dict:
+        """增量添加条目（自动去重，带同步日志）
+
+        items 可以是列表或任意可迭代对象，按 CHUNK_SIZE 分块入库，内存占用与总量无关。
+
+        Args:
+            date_range_start: 抓取日期范围的开始日期（用于记录日志）
+            date_range_end: 抓取日期范围的结束日期（用于记录日志）
+            items_skipped: 抓取时已按日期范围跳过的条目数（记入同步日志）
+        """
+        conn = self.conn
+        now = datetime.now().isoformat()
+
+        # 1. 集合式入库，重复 URL 由 ON CONFLICT 跳过并计数；其他信源已有的近似重复标记为 duplicate
+        ingested = ingest_items(conn, source_id, items, now, mark_duplicates=True)
+        fetched = ingested["fetched"]
+        added = ingested["added"]
+
+        # 2. 记录同步日志并更新 source_status
+        if fetched or items_skipped:
+            run_write(conn, _record_sync, conn, source_id, ingested, date_range_start, now,
+                      date_range_end, items_skipped)
+
+        return {
+            "status": "ok",
+            "source_id": source_id,
+            "fetched": fetched,
+            "added": added,
+            "duplicates": ingested["duplicates"],
+            "near_duplicates": ingested["near_duplicates"],
+            "skipped": items_skipped,
+            "duplicate_urls": ingested["duplicate_urls"]
+        }
+
+    def get_source_status(self, source_id: str = None) -> dict:
+        """获取信源同步状态"""
+        conn = self.conn
+
+        if source_id:
+            row = conn.execute(
+                """SELECT source_id, last_fetched_date, last_fetched_count,
+                   total_items_fetched, updated_at
+                   FROM source_status WHERE source_id = ?""",
+                (source_id,)
+            ).fetchone()
+            return dict(row) if row else {"source_id": source_id, "last_fetched_date": None}
+        else:
+            rows = conn.execute(
+                """SELECT source_id, last_fetched_date, last_fetched_count,
+                   total_items_fetched, updated_at
+                   FROM source_status ORDER BY updated_at DESC"""
+            ).fetchall()
+            return [dict(r) for r in rows]
+
+    def list_sync_log(self, source_id: str = None, limit: int = 10) -> list:
+        """获取同步日志（新到旧）"""
+        return list(self.iter_sync_log(source_id, limit=limit))
+
+    def iter_sync_log(self, source_id: str = None, after_id: int = None, limit: int = None):
+        """按 id 倒序（新到旧）逐行产出同步日志；after_id 为上一页最后一条的 id"""
+        conn = self.conn
+        sql = "SELECT * FROM source_sync_log WHERE 1 = 1"
+        params = []
+        if source_id:
+            sql += " AND source_id = ?"
+            params.append(source_id)
+        if after_id:
+            sql += " AND id < ?"
+            params.append(after_id)
+        sql += " ORDER BY id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        for row in conn.execute(sql, params):
+            yield dict(row)
+
+    def archive(self, older_than: str = "90d", dry_run: bool = False) -> dict:
+        """把早于 older_than 的条目、摘要、关键词和同步日志移入按年分库的归档库，然后压缩主库
+
+        归档库为 <db名>-archive-<年>.db，list-range --include-archive 会自动 ATTACH 查询。
+        已归档 URL 的哈希留在 archived_urls，再次抓到仍按重复跳过。
+        """
+        cutoff = (date.today() - parse_duration(older_than)).isoformat()
+        conn = self.conn
+
+        years = [
+            row[0] for row in conn.execute(
+                """SELECT substr(discovered_at, 1, 4) FROM items
+                   WHERE discovered_at < ? AND status != 'pending'
+                   UNION
+                   SELECT substr(sync_date, 1, 4) FROM source_sync_log WHERE sync_date < ?
+                   ORDER BY 1""",
+                (cutoff, cutoff)
+            )
+        ]
+        if dry_run:
+            return {"cutoff": cutoff, "dry_run": True,
+                    "archives": [str(archive_path(self.path, year)) for year in years]}
+
+        archived = []
+        for year in years:
+            # ATTACH/DETACH 不能在事务内执行；每年的搬移是一个写事务
+            conn.execute("ATTACH DATABASE ? AS archive", (str(archive_path(self.path, year)),))
+            try:
+                result = run_write(conn, _archive_year, conn, year, cutoff)
+            finally:
+                conn.execute("DETACH DATABASE archive")
+            result["path"] = str(archive_path(self.path, year))
+            archived.append(result)
+        if archived:
+            # 归档条目的哈希转入 archived_urls，URL 过滤文件按需重建
+            UrlFilter.path(self.path).unlink(missing_ok=True)
+
+        compacted = compact(conn)
+
+        return {
+            "cutoff": cutoff,
+            "archived": archived,
+            "items": sum(a["items"] for a in archived),
+            "sync_log": sum(a["sync_log"] for a in archived),
+            **compacted,
+        }
@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# 测试直接导入 scripts/ 下的 daily_news 包
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from daily_news import db  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """初始化好的临时数据库"""
+    path = str(tmp_path / "news.db")
+    db.init_db(path)
+    return path
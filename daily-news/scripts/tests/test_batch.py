@@ -0,0 +1,113 @@
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from daily_news import cli, db
+from daily_news.db import NewsDB
+
+
+def run(db_path, commands):
+    out = io.StringIO()
+    stream = io.StringIO("".join(json.dumps(c) + "\n" for c in commands))
+    summary = cli.run_batch(db_path, stream, out)
+    return summary, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_flag_options(db_path):
+    items = [{"title": "A", "url": "https://example.com/a"}]
+    summary, results = run(db_path, [
+        {"command": "add-items", "source": "s", "items": items},
+        {"command": "check-existing", "urls": ["https://example.com/a", "https://example.com/b"],
+         "filter": True},
+        {"command": "check-existing", "urls": ["https://example.com/a"], "filter": False},
+        {"command": "list-range", "from": "2000-01-01", "to": "2100-01-01", "include-archive": False},
+    ])
+    assert summary["failed"] == 0, results
+    assert results[1]["existing_urls"] == ["https://example.com/a"]
+    assert results[2]["count"] == 1
+    assert len(results[3]) == 1
+
+
+def test_commands_needing_ddl_are_rejected(db_path):
+    summary, results = run(db_path, [
+        {"command": "init"},
+        {"command": "archive", "older-than": "90d"},
+        {"command": "list-range", "from": "2000-01-01", "to": "2100-01-01", "include-archive": True},
+        {"command": "batch"},
+        {"command": "stats"},
+    ])
+    assert summary["failed"] == 4
+    assert all("not supported" in r["error"] for r in results[:4])
+    assert "total_items" in results[4]
+
+
+def test_stdin_file_args_are_rejected(db_path, tmp_path):
+    summaries = tmp_path / "summaries.jsonl"
+    summaries.write_text(json.dumps({"id": 1, "summary": "x"}) + "\n", encoding="utf-8")
+    summary, results = run(db_path, [
+        {"command": "add-items", "source": "s", "items-file": "-"},
+        {"command": "add-items-incremental", "source": "s", "items-file": "-"},
+        {"command": "check-existing", "urls-file": "-"},
+        {"command": "update-summaries"},
+        {"command": "add-items", "source": "s", "items": [{"title": "A", "url": "https://example.com/a"}]},
+        {"command": "update-summaries", "summaries-file": str(summaries)},
+    ])
+    # 前四条会读标准输入（即命令流本身），直接报错而不是抢读或阻塞
+    assert summary["failed"] == 4, results
+    assert all("stdin" in r["error"] for r in results[:4])
+    assert "--summaries-file" in results[3]["error"]
+    assert results[5]["updated"] == 1
+
+
+def test_begin_is_retried_while_another_writer_holds_the_lock(db_path, monkeypatch):
+    with NewsDB(db_path):
+        pass
+    monkeypatch.setattr(db, "BUSY_TIMEOUT_MS", 50)
+
+    conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+    conn.execute("BEGIN IMMEDIATE")
+    timer = threading.Timer(0.3, conn.execute, args=("COMMIT",))
+    timer.start()
+    try:
+        # 锁持有时间超过 busy_timeout，BEGIN IMMEDIATE 需要退避重试才能成功
+        summary, results = run(db_path, [
+            {"command": "add-items", "source": "s", "items": [{"title": "A", "url": "https://example.com/a"}]},
+        ])
+    finally:
+        timer.join()
+        conn.close()
+    assert summary["failed"] == 0, results
+    assert results[0]["added"] == 1
+
+
+def test_idle_producer_does_not_hold_write_lock(db_path):
+    with NewsDB(db_path) as news_db:
+        news_db.add_items("s", [{"title": "A", "url": "https://example.com/a"}])
+
+    read_fd, write_fd = os.pipe()
+    stream = os.fdopen(read_fd, encoding="utf-8")
+    producer = os.fdopen(write_fd, "w", encoding="utf-8")
+    out = io.StringIO()
+    batch = threading.Thread(target=cli.run_batch, args=(db_path, stream, out))
+    batch.start()
+    try:
+        producer.write(json.dumps({"command": "update-summary", "id": 1, "data": {"summary": "x"}}) + "\n")
+        producer.flush()
+        deadline = time.monotonic() + 5
+        while not out.getvalue() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert out.getvalue(), "batch should flush while waiting for input"
+
+        # batch 正在等待下一行：其他连接应能立即写入
+        conn = sqlite3.connect(db_path, timeout=0.5, isolation_level=None)
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("UPDATE items SET title = 'B' WHERE id = 1")
+        conn.execute("COMMIT")
+        conn.close()
+    finally:
+        producer.close()
+        batch.join(5)
+    assert json.loads(out.getvalue().splitlines()[0])["status"] == "ok"
@@ -0,0 +1,42 @@
+import multiprocessing
+
+import bench
+from daily_news import db
+from daily_news.db import NewsDB
+
+
+def test_concurrent_writers(tmp_path):
+    """几个进程同时入库和写摘要：锁冲突由 WAL + 重试消化，计数器与实际行数一致"""
+    result = bench.bench_stress(str(tmp_path), workers=4, rounds=10)[0]
+    assert result["errors"] == 0, result["error_samples"]
+    assert result["counters_consistent"]
+    assert result["items"] == 4 * 10 * 20 + 10 * 10
+
+
+def _filter_worker(args: tuple) -> list:
+    """入库一批自己的 URL，每轮之后用过滤文件检查全部 URL，返回每轮的错判"""
+    db_path, worker, rounds = args
+    errors = []
+    with NewsDB(db_path) as news_db:
+        for r in range(rounds):
+            own = [f"https://example.com/{worker}/{r}/{i}" for i in range(300)]
+            news_db.add_items(f"w{worker}", [{"title": "t", "url": url} for url in own])
+            probe = own + [f"https://example.com/{worker}/missing/{r}/{i}" for i in range(300)]
+            found = news_db.check_existing_urls(probe, use_filter=True)
+            if found != set(own):
+                errors.append((r, len(found ^ set(own))))
+    return errors
+
+
+def test_url_filter_across_processes(db_path):
+    """几个进程交替入库并补入同一个过滤文件：自己写入的 URL 都命中，不存在的都不命中"""
+    workers, rounds = 4, 6
+    with multiprocessing.Pool(workers) as pool:
+        results = pool.map(_filter_worker, [(db_path, w, rounds) for w in range(workers)])
+    assert results == [[]] * workers
+
+    every = [f"https://example.com/{w}/{r}/{i}" for w in range(workers) for r in range(rounds) for i in range(300)]
+    with NewsDB(db_path) as news_db:
+        assert news_db.check_existing_urls(every, use_filter=True) == set(every)
+    header = db.UrlFilter._read_header(open(db.UrlFilter.path(db_path), "rb"))
+    assert header[1] == workers * rounds * 300
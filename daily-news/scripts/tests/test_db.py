@@ -0,0 +1,230 @@
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from daily_news import cli, db
+from daily_news.db import NewsDB
+
+
+def test_new_database_uses_incremental_vacuum(db_path):
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+
+def test_readers_open_while_another_process_writes(db_path, monkeypatch):
+    with NewsDB(db_path) as news_db:
+        news_db.add_items("s", [{"title": "A", "url": "https://example.com/a"}])
+
+    writer = sqlite3.connect(db_path, isolation_level=None)
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute("UPDATE items SET title = 'B'")
+    try:
+        # 写锁被占用时，新连接上的只读命令不应等待或失败
+        monkeypatch.setattr(db, "BUSY_TIMEOUT_MS", 0)
+        db._schema_ready.discard(db_path)
+        with NewsDB(db_path) as news_db:
+            assert news_db.stats()["total_items"] == 1
+            assert news_db.list_today()[0]["title"] == "A"
+    finally:
+        writer.execute("ROLLBACK")
+        writer.close()
+
+
+def test_invalid_duration_is_a_usage_error(db_path, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["claim-pending", "--db", db_path, "--worker", "w", "--lease", "10x"])
+    assert exit_info.value.code == 2
+    assert "Invalid duration '10x'" in capsys.readouterr().err
+
+
+def test_short_terms_use_the_short_index(db_path):
+    with NewsDB(db_path) as news_db:
+        news_db.add_items("s", [
+            {"title": "大模型 发布", "url": "https://example.com/1"},
+            {"title": "OpenAI said hello", "url": "https://example.com/2"},
+            {"title": "New AI chip", "url": "https://example.com/3"},
+            {"title": "阿里云 A股 上涨", "url": "https://example.com/4"},
+        ])
+        news_db.update_summary(2, {"summary": "新模型上线", "relevance_score": 3})
+
+        def titles(query):
+            return sorted(r["title"] for r in news_db.search(query))
+
+        assert titles("模型") == ["OpenAI said hello", "大模型 发布"]
+        assert titles("云") == ["阿里云 A股 上涨"]
+        assert titles("AI") == ["New AI chip"]
+        assert titles("A股") == ["阿里云 A股 上涨"]
+        assert titles("模型 OpenAI") == ["OpenAI said hello"]
+
+        # 短词不再对全表做 LIKE：items_fts 只按候选 rowid 逐条取
+        news_db.update_summary(2, {"summary": "改写", "relevance_score": 3})
+        assert titles("模型") == ["大模型 发布"]
+
+        def plan(query):
+            statements = []
+            news_db.conn.set_trace_callback(statements.append)
+            news_db.search(query)
+            news_db.conn.set_trace_callback(None)
+            search_sql = next(sql for sql in statements if "items_fts_short MATCH" in sql)
+            return [row[3] for row in news_db.conn.execute("EXPLAIN QUERY PLAN " + search_sql)]
+
+        assert "SCAN f VIRTUAL TABLE INDEX 0:=" in plan("模型")
+        # 有长词时由 trigram MATCH 驱动，不能按短词候选逐个回查 MATCH
+        assert not any(step.startswith("SCAN f") and "=" in step for step in plan("模型 OpenAI"))
+
+
+def test_short_index_is_written_by_ingest_and_rebuilt_by_migration(db_path):
+    assert db.short_grams("阿里云 A股 上涨, AI said 5G") == "阿里 里云 云 股 上涨 涨 AI 5G"
+    with NewsDB(db_path) as news_db:
+        news_db.add_items("s", [
+            {"title": "大模型 发布 AI", "url": "https://example.com/1"},
+            {"title": "OpenAI said hello", "url": "https://example.com/2"},
+        ])
+        news_db.update_summaries([json.dumps({"id": 1, "summary": "新模型 v2 上线"})])
+        conn = news_db.conn
+        # 入库时不再经触发器逐字生成：items 上只剩删除触发器
+        assert [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND sql LIKE '%items_fts_short%'"
+        )] == ["trg_items_fts_short_delete", "trg_summaries_fts_short_delete"]
+        indexed = conn.execute("SELECT rowid, title, summary FROM items_fts_short ORDER BY rowid").fetchall()
+        assert [tuple(row) for row in indexed] == [
+            (1, "大模 模型 型 发布 布 AI", "新模 模型 型 v2 上线 线"), (2, "", "")
+        ]
+
+        conn.execute("DROP TABLE items_fts_short")
+        conn.execute("PRAGMA user_version = 13")
+        conn.commit()
+        db._schema_ready.discard(db_path)
+        assert 14 in db.migrate(conn)
+        rebuilt = conn.execute("SELECT rowid, title, summary FROM items_fts_short ORDER BY rowid").fetchall()
+        assert [tuple(row) for row in rebuilt] == [tuple(row) for row in indexed]
+
+
+def test_near_duplicates_only_look_at_recent_bands(db_path, monkeypatch):
+    title = "OpenAI releases new reasoning model for coding agents"
+    with NewsDB(db_path) as news_db:
+        news_db.add_items_incremental("a", [{"title": title, "url": "https://a.com/1"}])
+        news_db.add_items_incremental("b", [{"title": title + " today", "url": "https://b.com/1"}])
+        assert news_db.conn.execute("SELECT duplicate_of FROM items WHERE id = 2").fetchone()[0] == 1
+
+        # 窗口外的分段索引在下次入库时清理，旧条目不再作为候选
+        news_db.conn.execute("UPDATE items SET discovered_at = '2000-01-01T00:00:00'")
+        news_db.conn.commit()
+        news_db.add_items_incremental("c", [{"title": title, "url": "https://c.com/1"}])
+        assert news_db.conn.execute("SELECT duplicate_of FROM items WHERE id = 3").fetchone()[0] is None
+        assert [row[0] for row in news_db.conn.execute("SELECT DISTINCT item_id FROM minhash_bands")] == [3]
+
+        # 每个分段只取最近的若干条候选：不限时会选 ID 最小的同分条目 3，限 1 条时只看得到更新的 4
+        monkeypatch.setattr(db, "MINHASH_BAND_CANDIDATES", 1)
+        news_db.add_items_incremental("c", [{"title": title, "url": "https://c.com/2"}])
+        news_db.add_items_incremental("d", [{"title": title, "url": "https://d.com/1"}])
+        assert news_db.conn.execute("SELECT duplicate_of FROM items WHERE id = 5").fetchone()[0] == 4
+
+
+def test_near_duplicates_are_marked_per_chunk_within_the_window(db_path):
+    titles = [
+        "OpenAI releases new reasoning model for coding agents",
+        "Nvidia unveils Blackwell chips at developer conference keynote",
+        "阿里云发布通义千问新版本大模型",
+    ]
+    with NewsDB(db_path) as news_db:
+        conn = news_db.conn
+        # add-items 不检测近似重复，也不写分段索引
+        news_db.add_items("x", [{"title": titles[0], "url": "https://x.com/1"}])
+        assert conn.execute("SELECT count(*) FROM minhash_bands").fetchone()[0] == 0
+
+        news_db.add_items_incremental("a", [
+            {"title": title, "url": f"https://a.com/{i}"} for i, title in enumerate(titles)
+        ])
+        # 条目 2 在窗口内（6 天前），条目 3 在窗口外（8 天前），条目 4 是今天的
+        for item_id, days in ((2, 6), (3, 8)):
+            discovered = datetime.now() - timedelta(days=days)
+            conn.execute("UPDATE items SET discovered_at = ? WHERE id = ?", (discovered.isoformat(), item_id))
+        conn.commit()
+
+        result = news_db.add_items_incremental("b", [
+            {"title": titles[0] + " today", "url": "https://b.com/1"},
+            {"title": titles[1], "url": "https://b.com/2"},
+            {"title": titles[2] + "！", "url": "https://b.com/3"},
+            {"title": "Completely unrelated headline about football results", "url": "https://b.com/4"},
+        ])
+        assert result["near_duplicates"] == 2
+        rows = conn.execute("SELECT id, duplicate_of, status FROM items WHERE source_id = 'b' ORDER BY id")
+        assert [tuple(row) for row in rows] == [
+            (5, 2, "duplicate"), (6, None, "pending"), (7, 4, "duplicate"), (8, None, "pending")
+        ]
+
+        # 迁移回填也只写窗口内的条目（x 的条目 1 也在窗口内）
+        conn.execute("DELETE FROM minhash_bands")
+        db._migrate_v9(conn)
+        conn.commit()
+        indexed = conn.execute("SELECT DISTINCT item_id FROM minhash_bands ORDER BY item_id").fetchall()
+        assert [row[0] for row in indexed] == [1, 2, 4, 5, 6, 7, 8]
+
+
+def test_url_filter_hits_are_exact(db_path):
+    urls = [f"https://example.com/a/{i}" for i in range(2000)]
+    missing = [f"https://example.com/missing/{i}" for i in range(2000)]
+    with NewsDB(db_path) as news_db:
+        news_db.add_items("s", [{"title": "t", "url": url} for url in urls[:1000]])
+        assert news_db.check_existing_urls(urls + missing, use_filter=True) == set(urls[:1000])
+
+        # 新增条目先追加在文件末尾，累积多了合并重排；规范化后相同的 URL 同样命中
+        news_db.add_items("s", [{"title": "t", "url": urls[1000]}])
+        assert news_db.check_existing_urls([urls[1000] + "?utm_source=x", missing[0]], use_filter=True) == {
+            urls[1000] + "?utm_source=x"
+        }
+        news_db.add_items("s", [{"title": "t", "url": url} for url in urls[1001:]])
+        assert news_db.check_existing_urls(urls + missing, use_filter=True) == set(urls)
+        header = db.UrlFilter._read_header(open(db.UrlFilter.path(db_path), "rb"))
+        assert header[2:] == (2000, 0)
+
+        # 归档的条目仍算已存在；损坏的文件从库重建
+        news_db.conn.execute("UPDATE items SET discovered_at = '2000-01-01T00:00:00', status = 'summarized'")
+        news_db.conn.commit()
+        news_db.archive(older_than="1d")
+        assert news_db.stats()["total_items"] == 0
+        assert news_db.check_existing_urls(urls + missing, use_filter=True) == set(urls)
+        db.UrlFilter.path(db_path).write_bytes(b"garbage")
+        assert news_db.check_existing_urls(urls + missing, use_filter=True) == set(urls)
+
+
+def test_keyset_pages_cover_rows_with_equal_discovered_at(db_path):
+    with NewsDB(db_path) as news_db:
+        # 同一次入库的条目 discovered_at 相同
+        news_db.add_items("s", [{"title": f"A{i}", "url": f"https://example.com/a/{i}"} for i in range(7)])
+        news_db.add_items("s", [{"title": f"B{i}", "url": f"https://example.com/b/{i}"} for i in range(3)])
+        # 条目 1 的入库时间晚于其他所有条目：顺序按 (discovered_at, id)，不是按 id
+        news_db.conn.execute("UPDATE items SET discovered_at = ? WHERE id = 1", (datetime.now().isoformat(),))
+        news_db.conn.commit()
+        today = datetime.now().date().isoformat()
+
+        pages = []
+        after_id = 0
+        while after_id is not None:
+            page = news_db.list_range_page(today, today, after_id, page_size=3)
+            pages.append([item["id"] for item in page["items"]])
+            after_id = page["next_after_id"]
+        assert pages == [[2, 3, 4], [5, 6, 7], [8, 9, 10], [1]]
+        assert [item["id"] for item in news_db.iter_range(today, today)] == [2, 3, 4, 5, 6, 7, 8, 9, 10, 1]
+
+        with pytest.raises(ValueError):
+            list(news_db.iter_range(today, today, after_id=99))
+
+
+def test_profiler_counts_returning_rows_once(db_path, monkeypatch):
+    monkeypatch.setattr(db, "_profiler", db.Profiler())
+    conn = db.connect(db_path)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    rows = conn.execute("INSERT INTO t (x) VALUES (1), (2), (3) RETURNING x").fetchall()
+    conn.execute("UPDATE t SET x = x + 1")
+    conn.close()
+
+    stats = {stat["sql"].split(" ", 1)[0]: stat["rows"] for stat in db._profiler.statements.values()}
+    # RETURNING 的行在取结果时计数，不再叠加 rowcount；不返回行的写语句仍按影响行数计
+    assert len(rows) == 3 and stats["INSERT"] == 3
+    assert stats["UPDATE"] == 3
@@ -0,0 +1,179 @@
+import http.server
+import importlib.util
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+from daily_news.db import NewsDB
+
+RSS_METHOD = Path(__file__).resolve().parents[2] / "references" / "methods" / "rss.py"
+
+# RSS 1.0（RDF）不走流式解析，由 feedparser 处理
+RDF_FEED = b"""<?xml version="1.0" encoding="utf-8"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/">
+  <channel rdf:about="feed.rdf"><title>t</title><link>/</link><description>d</description></channel>
+  <item rdf:about="/a"><title>A</title><link>/a</link></item>
+  <item rdf:about="b.html"><title>B</title><link>b.html</link></item>
+</rdf:RDF>"""
+
+# 相对链接、各层 xml:base（绝对/相对）、元素自身的 xml:base、永久链接形式的 guid
+RSS_FEED = b"""<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0"><channel xml:base="/blog/"><title>t</title><link>/</link><description>d</description>
+  <item><title>A</title><link>/a</link></item>
+  <item><title>B</title><link>b.html</link></item>
+  <item xml:base="https://other.org/x/"><title>C</title><link>c</link></item>
+  <item><title>D</title><guid>d</guid></item>
+  <item><title>E</title><link xml:base="sub/">e</link></item>
+  <item><title>F</title><link>https://abs.example.com/f</link></item>
+</channel></rss>"""
+
+# 一条今天、一条很久以前的条目（日期在测试运行时填入）
+DATED_FEED = f"""<?xml version="1.0" encoding="utf-8"?>
+<rss version="2.0"><channel><title>t</title><link>/</link><description>d</description>
+  <item><title>New</title><link>/new</link><pubDate>{datetime.now():%a, %d %b %Y} 08:00:00 GMT</pubDate></item>
+  <item><title>Old</title><link>/old</link><pubDate>Mon, 06 Jan 2020 08:00:00 GMT</pubDate></item>
+</channel></rss>""".encode()
+
+ATOM_FEED = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xml:base="/news/"><title>t</title>
+  <entry><title>A</title><link href="/a"/></entry>
+  <entry xml:base="sub/"><title>B</title><link href="b"/></entry>
+  <entry><title>C</title><link xml:base="https://z.org/q/" href="c"/></entry>
+  <entry><title>D</title><link rel="alternate" href="../d"/></entry>
+</feed>"""
+
+
+@pytest.fixture(scope="module")
+def rss():
+    spec = importlib.util.spec_from_file_location("rss", RSS_METHOD)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def feed_server():
+    """本地 HTTP 服务：/feeds/<名字> 返回 feeds[名字]，/old/<名字> 重定向到它"""
+    feeds = {}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/old/"):
+                self.send_response(301)
+                self.send_header("Location", self.path.replace("/old/", "/feeds/"))
+                self.end_headers()
+                return
+            body = feeds.get(self.path.removeprefix("/feeds/"))
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", feeds
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_feedparser_resolves_relative_links_against_final_url(rss, feed_server):
+    base, feeds = feed_server
+    feeds["feed.rdf"] = RDF_FEED
+    items = rss.fetch(f"{base}/old/feed.rdf")
+    assert [item["url"] for item in items] == [f"{base}/a", f"{base}/feeds/b.html"]
+
+
+def test_fetch_returns_only_the_result(rss, feed_server):
+    base, feeds = feed_server
+    feeds["feed.xml"] = RSS_FEED
+    url = f"{base}/feeds/feed.xml"
+    items = rss.fetch(url, limit=2)
+    assert isinstance(items, list) and [item["title"] for item in items] == ["A", "B"]
+    assert rss.fetch(f"{base}/feeds/missing.xml") == {"error": "HTTP 404"}
+
+    # 缓存项由 fetch_with_cache 单独返回；未变化的 feed 两者都报告 not_modified
+    result, entry = rss.fetch_with_cache(url, limit=2, cached={})
+    assert result == items and entry["sha256"]
+    assert rss.fetch(url, cached=entry) == {"not_modified": True}
+    assert rss.fetch_with_cache(url, cached=entry)[0] == {"not_modified": True}
+
+
+@pytest.mark.parametrize("body", [RSS_FEED, ATOM_FEED], ids=["rss", "atom"])
+def test_stream_parser_resolves_links_like_feedparser(rss, body):
+    base_url = "https://feeds.example.net/path/feed.xml"
+    streamed = [item for item in rss.stream_items(body, base_url) if item]
+    parsed = rss.feedparser.parse(body, response_headers={"content-type": "application/xml",
+                                                           "content-location": base_url})
+    assert streamed == [item for item in map(rss.entry_item, parsed.entries) if item]
+    assert all(item["url"].startswith("https://") for item in streamed)
+
+
+def test_cache_entry_is_saved_only_after_ingest_succeeds(rss, feed_server, db_path, monkeypatch):
+    base, feeds = feed_server
+    feeds["feed.xml"] = RSS_FEED
+    url = f"{base}/feeds/feed.xml"
+    methods = [{"source_id": "s", "source_url": url}]
+    cache = {}
+    with NewsDB(db_path) as news_db:
+        def fail(*args):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(news_db, "add_items_incremental", fail)
+        [result] = rss.ingest_all(news_db, methods, cache=cache)
+        assert result["error"] == "Failed to ingest: OSError: disk full"
+        assert cache == {}
+
+        # 入库失败没有写缓存，下次仍会下载并入库，而不是当作未变化跳过
+        monkeypatch.undo()
+        [result] = rss.ingest_all(news_db, methods, cache=cache)
+        assert result["added"] == 6
+        assert url in cache
+
+        [result] = rss.ingest_all(news_db, methods, cache=cache)
+        assert result["not_modified"]
+
+
+@pytest.mark.parametrize("strategy, expected", [
+    (None, "2026-01-27"),
+    ("incremental", "2026-01-27"),
+    ("today", "2026-02-10"),
+    ("last-3-days", "2026-02-07"),
+    ("all", None),
+])
+def test_last_fetched_follows_fetch_strategy(rss, strategy, expected):
+    method = {"source_id": "s", "last_fetched_date": "2026-01-27"}
+    if strategy:
+        method["fetch_strategy"] = strategy
+    assert rss.method_since(method, rss.LAST_FETCHED, today="2026-02-10") == expected
+    # 显式日期不受 fetch_strategy 影响
+    assert rss.method_since(method, "2026-01-01", today="2026-02-10") == "2026-01-01"
+
+
+def test_incremental_strategy_without_history_fetches_everything(rss):
+    assert rss.method_since({"fetch_strategy": "incremental"}, rss.LAST_FETCHED) is None
+    assert rss.method_since({"fetch_strategy": "today"}, rss.LAST_FETCHED) == datetime.now().date().isoformat()
+
+
+def test_ingest_all_uses_fetch_strategy(rss, feed_server, db_path):
+    base, feeds = feed_server
+    feeds["dated.xml"] = DATED_FEED
+    url = f"{base}/feeds/dated.xml"
+    today = datetime.now().date()
+    methods = [{"source_id": "s", "source_url": url, "fetch_strategy": "last-3-days",
+                "last_fetched_date": "2000-01-01"}]
+    with NewsDB(db_path) as news_db:
+        [result] = rss.ingest_all(news_db, methods, since=rss.LAST_FETCHED)
+    assert result["since"] == (today - timedelta(days=3)).isoformat()
+    assert (result["added"], result["skipped"]) == (1, 1)